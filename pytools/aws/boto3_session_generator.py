@@ -7,6 +7,7 @@ import os
 from typing import Optional
 
 from boto3.session import Session as Boto3Session
+from botocore.session import Session as BotocoreSession
 from botocore.exceptions import EndpointConnectionError, ProfileNotFound
 
 from pytools.common.logger import Logger
@@ -42,32 +43,42 @@ class Boto3SessionGenerator:
         self._logger = Logger(__name__)
 
     @RetryAndBackoffBoto3Session()
-    def generate_default_session(self) -> Boto3Session:
+    def generate_default_session(
+        self, botocore_session: Optional[BotocoreSession] = None
+    ) -> Boto3Session:
         """
         Generate `Session` for `default_profile`.
 
         If profile is not found, generates a `Session` with no profile set.
 
+        Arguments:
+            botocore_session -- (optional) botocore session to base the `Session` on.
+
         Returns:
             Generated Session.
         """
         if self.default_profile:
             try:
-                return self.generate_profile_session(self.default_profile)
+                return self.generate_profile_session(self.default_profile, botocore_session)
             except ProfileNotFound as e:
                 self._logger.debug(
                     f"Cannot generate session for {self.default_profile}"
                     f" profile, generating a default Session instead: {e}"
                 )
+                if botocore_session is not None:
+                    botocore_session.set_config_variable("profile", None)
 
-        return Boto3Session(region_name=self.aws_region)
+        return Boto3Session(botocore_session=botocore_session, region_name=self.aws_region)
 
     @RetryAndBackoffBoto3Session()
-    def generate_profile_session(self, profile_name: str) -> Boto3Session:
+    def generate_profile_session(
+        self, profile_name: str, botocore_session: Optional[BotocoreSession] = None
+    ) -> Boto3Session:
         """
         Generate `Session` for `profile_name`.
         Arguments:
             profile_name -- Profile name.
+            botocore_session -- (optional) botocore session to base the `Session` on.
 
         Returns:
             Generated Session.
@@ -76,7 +87,11 @@ class Boto3SessionGenerator:
             botocore.exceptions.ProfileNotFound -- If profile with given tanem was not found.
         """
         self._logger.debug(f"Generating boto3 session for profile {profile_name}")
-        return Boto3Session(profile_name=profile_name, region_name=self.aws_region)
+        return Boto3Session(
+            botocore_session=botocore_session,
+            profile_name=profile_name,
+            region_name=self.aws_region,
+        )
 
     @RetryAndBackoffBoto3Session()
     def generate_session_from_role(self, role_arn: str) -> Boto3Session:
@@ -1,6 +1,6 @@
 #!/usr/bin/env python
 
-from typing import Any
+from typing import Any, Dict, Sequence
 
 from pytools.aws.boto3_connect import Boto3Connect
 from pytools.common.string_utils import StringUtils
@@ -77,6 +77,38 @@ class SsmConnect(Boto3Connect):
 
         return response["Parameter"]["Value"]
 
+    def get_parameter_values(
+        self, names: Sequence[str], with_decryption: bool = False
+    ) -> Dict[str, str]:
+        """
+        Get the values of multiple AWS SSM parameters, using as few API calls as possible
+
+        [boto3 - get_parameters](
+            https://boto3.amazonaws.com/v1/documentation/api/latest/reference/services/ssm.html#SSM.Client.get_parameters
+        )
+
+        Arguments:
+            names -- AWS SSM parameter names
+            with_decryption -- Whether to decrypt the values (SecureString type)
+
+        Returns:
+            Parameter string values by name.
+        """
+        values: Dict[str, str] = {}
+        unique_names = list(dict.fromkeys(names))
+        # `GetParameters` accepts at most 10 names per call.
+        for i in range(0, len(unique_names), 10):
+            response = self.client.get_parameters(
+                Names=unique_names[i : i + 10], WithDecryption=with_decryption
+            )
+            if response.get("InvalidParameters"):
+                raise SsmConnectError(
+                    f"Parameters {', '.join(response['InvalidParameters'])} not found"
+                )
+            for parameter in response["Parameters"]:
+                values[parameter["Name"]] = parameter["Value"]
+        return values
+
 
 def main() -> None:
     ssm_connect = SsmConnect()
@@ -445,6 +445,19 @@ class Logger(logging.Logger):
                 handler.setLevel(log_level)
             self._level = level
 
+    def isEnabledFor(self, level: int) -> bool:  # pylint: disable=invalid-name
+        """
+        Alias for `logging.isEnabledFor`. Use this to skip building expensive log messages
+        that would be discarded anyway.
+
+        Arguments:
+            level -- Log level.
+
+        Returns:
+            Whether messages of the given level are logged.
+        """
+        return level >= self.level
+
     def debug(self, message: str, exc_info: Optional[BaseException] = None) -> None:  # type: ignore
         """
         Alias for `logging.debug`.
@@ -69,6 +69,8 @@ class RetryAndBackoff:
         default_log_level -- `Logger.ERROR`
         default_fallback_value -- `NOT_SET`
         exponential_backoff -- Backoff that returns delay for each retry.
+        full_jitter_backoff -- Backoff that returns a random delay between zero and an
+            exponentially growing, capped maximum.
         backoff -- `exponential_backoff` is used
     """
 
@@ -154,6 +156,26 @@ class RetryAndBackoff:
         """
         return random.uniform(2 ** (attempt_number - 1), 2**attempt_number)
 
+    @classmethod
+    def full_jitter_backoff(
+        cls, attempt_number: int, base: float = 1.0, cap: float = 32.0
+    ) -> float:
+        """
+        Generate delay based on exponential backoff with "full jitter": a random delay between
+        zero and `base * 2 ** attempt_number`, capped at `cap`. When many clients retry after a
+        common failure, this spreads out their retries the most.
+        See <https://aws.amazon.com/blogs/architecture/exponential-backoff-and-jitter/>.
+
+        Arguments:
+            attempt_number -- Retry attempt number
+            base -- Maximum delay in seconds for attempt number 0
+            cap -- Maximum delay in seconds for any attempt
+
+        Returns:
+            Delay in seconds.
+        """
+        return random.uniform(0, min(cap, base * 2**attempt_number))
+
     @classmethod
     def backoff(cls, attempt_number: int) -> float:
         """
@@ -7,6 +7,7 @@ from .base import (
     QueryPlanNode,
     Rollback,
 )
+from .pool import ConnectionPool
 from .postgresql import PostgreSQLAdapter
 
 __all__ = [
@@ -20,6 +21,7 @@ __all__ = [
     "QueryPlan",
     "QueryPlanNode",
     "Rollback",
+    "ConnectionPool",
     "get_adapter_class",
     "PostgreSQLAdapter",
 ]
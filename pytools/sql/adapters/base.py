@@ -9,6 +9,7 @@ from typing import (
     ContextManager,
     Dict,
     Generic,
+    Iterable,
     Iterator,
     List,
     Optional,
@@ -63,15 +64,20 @@ class IsolationLevel(Enum):
 # =============================================================================
 
 
-@dataclass
+@dataclass(slots=True)
 class QueryPlanNode:
-    """Generic query plan node."""
+    """
+    Generic query plan node.
+
+    Plans for large queries may consist of hundreds of nodes, so instances use `__slots__` to
+    stay small. Subclasses must be `slots=True` dataclasses as well.
+    """
 
     def as_dict(self) -> Dict[str, Any]:
         return dataclasses.asdict(self)
 
 
-@dataclass
+@dataclass(slots=True)
 class QueryPlan:
     """Generic query plan."""
 
@@ -95,7 +101,11 @@ class DatabaseAdapter(Generic[ConnectionT, CursorT], ABC):
     TupleCursor: Type[CursorT] = cast(Type[CursorT], pep249.TupleCursor)
     DictCursor: Type[CursorT] = cast(Type[CursorT], pep249.DictCursor)
 
-    # Registry mapping database types to adapter classes:
+    # Name of the database type, as used for `Query` variants:
+    database_type: str
+    # Quote character recognized by the database for identifiers. A plain class attribute
+    # rather than a property, as it is constant and may be read for every query:
+    identifier_quote_char: str
 
     # Class methods
     # =========================================================================
@@ -149,7 +159,11 @@ class DatabaseAdapter(Generic[ConnectionT, CursorT], ABC):
 
     # TODO: remove this?
     def _query_string(self, query_string: QueryT) -> str:
-        return query_string[self.database_type] if isinstance(query_string, Query) else query_string
+        if isinstance(query_string, Query):
+            if query_string.database_type == self.database_type:
+                return cast(str, query_string.rendered)
+            return query_string[self.database_type]
+        return query_string
 
     @abstractmethod
     def connect(self) -> ConnectionT:
@@ -210,6 +224,19 @@ class DatabaseAdapter(Generic[ConnectionT, CursorT], ABC):
         """Returns the number of database connections as seen from the database system."""
         return self.connection_count_for_database()
 
+    def estimated_row_count(self, table_name: str) -> int:
+        """
+        Returns the approximate number of rows in the given table, according to the statistics
+        maintained by the database system. Unlike `SELECT COUNT(*)`, this does not scan the
+        table, but the statistics may be out of date.
+
+        Arguments:
+            table_name: str -- Name of the table, optionally schema-qualified.
+        """
+        raise NotImplementedError(
+            f"{self.__class__.__name__} does not support estimated row counts"
+        )
+
     @abstractmethod
     def _getvar(self, path: List[str]) -> Any:
         """
@@ -317,11 +344,6 @@ class DatabaseAdapter(Generic[ConnectionT, CursorT], ABC):
         ...     # use new feature in database version x.y
         """
 
-    @cached_property
-    @abstractmethod
-    def identifier_quote_char(self) -> str:
-        """Returns the quote character recognized by the database."""
-
     @property
     @abstractmethod
     def connection_id(self) -> int:
@@ -415,7 +437,7 @@ class DatabaseAdapter(Generic[ConnectionT, CursorT], ABC):
     def execute(
         self,
         cursor: CursorT,
-        query_string: str,
+        query_string: QueryT,
         query_params: Optional[QueryParams] = None,
         **kwargs: Any,
     ) -> None:
@@ -427,7 +449,7 @@ class DatabaseAdapter(Generic[ConnectionT, CursorT], ABC):
             query_string: Query | str -- The SQL query to execute.
             query_params: tuple | dict (optional) -- Query parameters.
         """
-        # query_string = self._query_string(query_string)
+        query_string = self._query_string(query_string)
 
         if self.execute_contextmanager:
             with self.execute_contextmanager(cursor, query_string, query_params, **kwargs) as (
@@ -435,9 +457,18 @@ class DatabaseAdapter(Generic[ConnectionT, CursorT], ABC):
                 new_query_string,
                 new_query_params,
             ):
-                cursor.execute(new_query_string, new_query_params)
+                self._execute(cursor, new_query_string, new_query_params)
         else:
-            cursor.execute(query_string, query_params)
+            self._execute(cursor, query_string, query_params)
+
+    def _execute(
+        self, cursor: CursorT, query_string: str, query_params: Optional[QueryParams]
+    ) -> None:
+        """
+        Sends a statement to the server. Override this to change how statements are sent,
+        after `execute_contextmanager` has had its say.
+        """
+        cursor.execute(query_string, query_params)
 
     def select(
         self,
@@ -463,6 +494,52 @@ class DatabaseAdapter(Generic[ConnectionT, CursorT], ABC):
         finally:
             cursor.close()
 
+    @contextmanager
+    def pipeline(self) -> Iterator:
+        """
+        Execute a context in pipeline mode, if the driver supports it: statements executed
+        during the context are sent to the server without waiting for the results of preceding
+        statements, and results may only be available once the context is exited. Otherwise
+        the statements are executed one after the other as usual.
+
+        Use this for independent statements, to save round-trips.
+        """
+        yield self
+
+    def select_many(
+        self,
+        queries: Iterable[Tuple[QueryT, Optional[QueryParams]]],
+        *,
+        cursor_class: Optional[Type[CursorT]] = None,
+        **kwargs: Any,
+    ) -> List[Sequence[Any]]:
+        """
+        Execute a number of independent statements, returning the results of each, without
+        transaction behavior.
+
+        Adapters whose drivers support it submit all statements at once and wait for their
+        results only at the end, instead of making one round-trip per statement. Otherwise
+        the statements are executed one after the other.
+
+        For example:
+
+        >>> users, groups = database_adapter.select_many(
+        ...     [("SELECT * FROM users WHERE id = %s", (1,)), ("SELECT * FROM groups", None)]
+        ... )
+
+        Arguments:
+            queries: Iterable[tuple] -- Pairs of query string and query parameters (or
+                `None`).
+            cursor_class: Type[Cursor] -- Cursor class to use for fetching results.
+
+        Returns:
+            Results of each statement, in the order of `queries`.
+        """
+        return [
+            self.select(query_string, query_params, cursor_class=cursor_class, **kwargs)
+            for query_string, query_params in queries
+        ]
+
     def select_row(
         self,
         query_string: QueryT,
@@ -482,11 +559,8 @@ class DatabaseAdapter(Generic[ConnectionT, CursorT], ABC):
         cursor = self.cursor(cursor_class=cursor_class)
         try:
             self.execute(cursor, query_string, query_params, **kwargs)
-            for result in cursor:
-                return result
-            else:  # pylint: disable=useless-else-on-loop
-                # No rows.
-                return None
+            # `fetchone` returns `None` if there are no rows.
+            return cursor.fetchone()
         finally:
             cursor.close()
 
@@ -503,10 +577,13 @@ class DatabaseAdapter(Generic[ConnectionT, CursorT], ABC):
             query_string: Query | str -- The SQL query to execute.
             query_params: tuple | dict (optional) -- Query parameters.
         """
-        result = self.select_row(
-            query_string, query_params, cursor_class=self.TupleCursor, **kwargs
-        )
-        return result[0] if result is not None else None
+        cursor = self.cursor(cursor_class=self.TupleCursor)
+        try:
+            self.execute(cursor, query_string, query_params, **kwargs)
+            row = cursor.fetchone()
+            return row[0] if row is not None else None
+        finally:
+            cursor.close()
 
     def select_iter(
         self,
@@ -0,0 +1,130 @@
+"""
+Caching pool for database connections.
+
+Connections that are no longer used by an adapter are kept open and handed out again to
+adapters connecting to the same route, saving the TCP, TLS, and authentication round-trips of
+establishing a new connection. Idle connections are closed after `idle_ttl` seconds.
+
+The most recently checked in connection is handed out first, so that a small set of hot
+connections (with warm server-side caches) is reused, while surplus connections age out.
+"""
+
+import threading
+import time
+from collections import deque
+from typing import Callable, Deque, Dict, Generic, Hashable, List, Optional, Tuple, TypeVar
+
+from .. import pep249
+
+ConnectionT = TypeVar("ConnectionT", bound=pep249.Connection)
+
+
+class ConnectionPool(Generic[ConnectionT]):
+    """
+    Thread-safe pool of idle database connections, grouped by key (typically identifying the
+    route they were established to).
+
+    Expired idle connections are closed lazily, when the pool is next accessed for the same key.
+
+    For example:
+
+    >>> connection = pool.checkout(key, is_usable, ping) or connect()
+    >>> ...
+    >>> pool.checkin(key, connection)
+    """
+
+    def __init__(
+        self, *, idle_ttl: float = 60.0, max_idle: int = 10, ping_after: float = 30.0
+    ) -> None:
+        """
+        Arguments:
+            idle_ttl: float -- Close connections that have been idle for this many seconds
+                (default: 60).
+            max_idle: int -- Keep at most this many idle connections per key; close any
+                connections checked in beyond that (default: 10).
+            ping_after: float -- Ping connections that have been idle for this many seconds
+                before handing them out, if `checkout` is given a `ping` function (default: 30).
+        """
+        self.idle_ttl = idle_ttl
+        self.max_idle = max_idle
+        self.ping_after = ping_after
+
+        self._idle: Dict[Hashable, Deque[Tuple[float, ConnectionT]]] = {}
+        self._lock = threading.Lock()
+
+    def checkout(
+        self,
+        key: Hashable,
+        is_usable: Optional[Callable[[ConnectionT], bool]] = None,
+        ping: Optional[Callable[[ConnectionT], bool]] = None,
+    ) -> Optional[ConnectionT]:
+        """
+        Take the most recently checked in idle connection for the given key out of the pool.
+
+        Arguments:
+            key: Hashable -- Key the connection was checked in with.
+            is_usable: Callable (optional) -- Returns whether a connection can be handed out.
+                Unusable connections are closed and discarded.
+            ping: Callable (optional) -- Like `is_usable`, but does a round-trip to the server.
+                Only called for connections that have been idle for more than `ping_after`
+                seconds.
+
+        Returns:
+            Idle connection, or `None` if there is none.
+        """
+        discarded: List[ConnectionT] = []
+        connection: Optional[ConnectionT] = None
+        now = time.monotonic()
+        expires_before = now - self.idle_ttl
+        with self._lock:
+            idle = self._idle.get(key)
+            # Connections are checked in at the right, so expired ones accumulate at the left:
+            while idle and idle[0][0] < expires_before:
+                discarded.append(idle.popleft()[1])
+            if idle:
+                checked_in_at, connection = idle.pop()
+
+        # Close connections and check usability outside of the lock, as these may do I/O.
+        for discarded_connection in discarded:
+            self._close(discarded_connection)
+        if connection is not None and not (
+            (is_usable is None or is_usable(connection))
+            and (ping is None or checked_in_at >= now - self.ping_after or ping(connection))
+        ):
+            self._close(connection)
+            return self.checkout(key, is_usable, ping)
+        return connection
+
+    def checkin(self, key: Hashable, connection: ConnectionT) -> None:
+        """
+        Return a connection to the pool for reuse. The connection must not be used by the caller
+        afterwards.
+
+        Arguments:
+            key: Hashable -- Key to group the connection by.
+            connection: Connection -- Connection to return to the pool.
+        """
+        with self._lock:
+            idle = self._idle.setdefault(key, deque())
+            if len(idle) < self.max_idle:
+                idle.append((time.monotonic(), connection))
+                return
+        self._close(connection)
+
+    def clear(self) -> None:
+        """Close all idle connections."""
+        with self._lock:
+            idle_connections = [
+                connection for idle in self._idle.values() for _, connection in idle
+            ]
+            self._idle.clear()
+        for connection in idle_connections:
+            self._close(connection)
+
+    @staticmethod
+    def _close(connection: ConnectionT) -> None:
+        try:
+            connection.close()
+        except Exception:  # pylint: disable=broad-except
+            # The connection is being discarded anyway.
+            pass
@@ -6,25 +6,41 @@ defined in the `pytools.sql.sql_connect` module.
 """
 
 import contextlib
+import functools
+import hashlib
+import itertools
 import re
 import sys
 from contextlib import contextmanager
 from dataclasses import dataclass, field
-from typing import Any, Iterator, Optional, Tuple, Type
+from types import CodeType
+from typing import (
+    IO,
+    Any,
+    Iterable,
+    Iterator,
+    List,
+    Mapping,
+    Optional,
+    Sequence,
+    Set,
+    Tuple,
+    Type,
+)
 
 import psycopg2
+import psycopg2.errors
 import psycopg2.extensions
-import psycopg2.extras
 
+import pytools.common.dynamic_namespace
 import pytools.common.retry_backoff
-import pytools.sql.adapters.base
-from pytools.common.class_utils import cached_property
+from pytools.common.class_utils import class_property
 from pytools.common.file_utils import relativize_path
-from pytools.common.retry_backoff import RetryAndBackoff
-from pytools.common.call_stack import getcaller
+from pytools.common.retry_backoff import RetryAndBackoff, RetryState
 
 from ..query import QueryT
 from ..route import Route
+from . import base
 from .base import (
     DatabaseAdapter,
     ExecuteContextManagerFactory,
@@ -34,6 +50,7 @@ from .base import (
     QueryPlanNode,
 )
 from .errors import ResponseError
+from .pool import ConnectionPool
 
 # Types
 # =============================================================================
@@ -45,8 +62,198 @@ PostgreSQLConnection = psycopg2.extensions.connection
 PostgreSQLCursor = psycopg2.extensions.cursor
 PostgreSQLTupleCursor = psycopg2.extensions.cursor
 
-# <https://www.psycopg.org/docs/extras.html#real-dictionary-cursor>
-PostgreSQLDictCursor = psycopg2.extras.RealDictCursor
+
+def _dict_cursor_class() -> Type[PostgreSQLCursor]:
+    # `psycopg2.extras` pulls in a number of modules that are not needed otherwise, so import
+    # it only once a dict cursor is actually requested.
+    import psycopg2.extras  # pylint: disable=import-outside-toplevel
+
+    # <https://www.psycopg.org/docs/extras.html#real-dictionary-cursor>
+    return psycopg2.extras.RealDictCursor
+
+
+def __getattr__(name: str) -> Any:
+    # Resolve `PostgreSQLDictCursor` lazily (PEP 562).
+    if name == "PostgreSQLDictCursor":
+        return _dict_cursor_class()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def _parse_server_version(server_version: str) -> Tuple[int, ...]:
+    """
+    Parses the numeric part of the `server_version` variable, e.g. `(12, 3)` from
+    `12.3 (Debian 12.3-1.pgdg100+1)`. Returns an empty tuple if there is none.
+    """
+    # A simple scan is considerably faster than a regular expression plus splitting.
+    parts = []
+    number = ""
+    for char in server_version:
+        if "0" <= char <= "9":
+            number += char
+        elif char == "." and number:
+            parts.append(int(number))
+            number = ""
+        else:
+            break
+    if number:
+        parts.append(int(number))
+    return tuple(parts)
+
+
+@functools.lru_cache(maxsize=4096)
+def _quote_ident(name: str) -> str:
+    # Equivalent to libpq's `PQescapeIdentifier`, as used by `psycopg2.extensions.quote_ident`,
+    # but done locally. Identifiers are drawn from a small set, so cache them.
+    # <https://www.postgresql.org/docs/current/sql-syntax-lexical.html#SQL-SYNTAX-IDENTIFIERS>
+    if "\0" in name:
+        raise ValueError(f"Identifier must not contain NUL characters: {name!r}")
+    return '"' + name.replace('"', '""') + '"'
+
+
+# Values of the `transaction_isolation` run-time parameter for each isolation level, e.g.
+# `read committed` for `IsolationLevel.READ_COMMITTED`:
+_ISOLATION_LEVEL_SETTINGS = {
+    isolation_level: isolation_level.name.lower().replace("_", " ")
+    for isolation_level in IsolationLevel
+}
+_ISOLATION_LEVEL_BY_SETTING = {
+    setting: isolation_level for isolation_level, setting in _ISOLATION_LEVEL_SETTINGS.items()
+}
+
+
+def _variable_name(path: Tuple[str, ...]) -> str:
+    return ".".join(map(_quote_ident, path))
+
+
+@functools.lru_cache(maxsize=256)
+def _show_statement(path: Tuple[str, ...]) -> str:
+    # The same few run-time parameters are read and written over and over, so cache the
+    # statements.
+    return f"SHOW {_variable_name(path)}"
+
+
+@functools.lru_cache(maxsize=256)
+def _set_statement(path: Tuple[str, ...]) -> str:
+    return f"SET {_variable_name(path)} = %s"
+
+
+# Prepared statements
+# =============================================================================
+
+# Statements that can be prepared: <https://www.postgresql.org/docs/current/sql-prepare.html>
+_PREPARABLE_COMMANDS = frozenset(("SELECT", "INSERT", "UPDATE", "DELETE", "VALUES", "WITH"))
+
+# `psycopg2` placeholders (`%s` and `%(name)s`) and escaped percent signs:
+_PLACEHOLDER_PATTERN = re.compile(r"%(?:\((\w+)\))?s|%%")
+
+
+@dataclass(frozen=True)
+class _PreparedStatement:
+    """`PREPARE` and `EXECUTE` statements equivalent to a statement with `psycopg2` placeholders."""
+
+    name: str
+    prepare_statement: str
+    # Has `psycopg2` placeholders for the parameters:
+    execute_statement: str
+    # Names of the parameters in order, for named placeholders; `None` for positional ones:
+    param_names: Optional[Tuple[str, ...]]
+    param_count: int
+
+
+@functools.lru_cache(maxsize=1024)
+def _prepared_statement(query_string: str, has_params: bool) -> Optional[_PreparedStatement]:
+    """
+    Translates a statement with `psycopg2` placeholders to a prepared statement. Returns `None`
+    if the statement cannot be prepared.
+    """
+    query_string = query_string.strip().rstrip(";")
+    words = query_string.split(None, 1)
+    if (
+        not words
+        or words[0].upper() not in _PREPARABLE_COMMANDS
+        or ";" in query_string
+        or "$" in query_string
+    ):
+        # Multiple statements, or ones that may already use `$n` placeholders or dollar quoting.
+        return None
+
+    param_names: List[str] = []
+    positional_count = 0
+
+    def replace_placeholder(match: "re.Match[str]") -> str:
+        nonlocal positional_count
+        if match[0] == "%%":
+            return "%"
+        if match[1] is None:
+            positional_count += 1
+            return f"${positional_count}"
+        if match[1] not in param_names:
+            param_names.append(match[1])
+        return f"${param_names.index(match[1]) + 1}"
+
+    # Without parameters, `psycopg2` sends the statement as is.
+    body = query_string
+    if has_params:
+        body = _PLACEHOLDER_PATTERN.sub(replace_placeholder, query_string)
+    if param_names and positional_count:
+        return None
+
+    param_count = len(param_names) or positional_count
+    name = f"pytools_{hashlib.sha1(body.encode()).hexdigest()[:16]}"
+    execute_statement = f"EXECUTE {name}"
+    if param_count:
+        execute_statement += f"({', '.join(['%s'] * param_count)})"
+    return _PreparedStatement(
+        name=name,
+        prepare_statement=f"PREPARE {name} AS {body}",
+        execute_statement=execute_statement,
+        param_names=tuple(param_names) if param_names else None,
+        param_count=param_count,
+    )
+
+
+# Names of statements that failed to prepare, e.g. because a placeholder is not in an expression
+# position (`INTERVAL %s`), so that they are not tried again:
+_unpreparable_statements: Set[str] = set()
+
+
+def _prepared_params(
+    prepared: _PreparedStatement, query_params: Optional[QueryParams]
+) -> Optional[Tuple]:
+    """
+    Returns the parameter values for the `EXECUTE` statement in order, or `None` if the given
+    parameters cannot be passed to the prepared statement.
+    """
+    if query_params is None:
+        values: Tuple = ()
+    elif prepared.param_names is not None:
+        if not isinstance(query_params, Mapping):
+            return None
+        try:
+            values = tuple(query_params[name] for name in prepared.param_names)
+        except KeyError:
+            return None
+    elif isinstance(query_params, Mapping):
+        return None
+    else:
+        values = tuple(query_params)
+    if len(values) != prepared.param_count:
+        return None
+    # Tuples are rendered as `(a, b)` lists and `AsIs` values as SQL, not as parameter values:
+    if any(isinstance(value, (tuple, psycopg2.extensions.AsIs)) for value in values):
+        return None
+    return values
+
+
+@functools.lru_cache(maxsize=1024)
+def _format_application_name(code: CodeType, lineno: int) -> str:
+    # Connections are opened from a limited number of call sites, so cache per call site.
+    caller_filename = relativize_path(code.co_filename, sys.path)
+    application_name = f"{caller_filename}:{lineno}:{code.co_name}"
+    if len(application_name) > 63:
+        # Shorten to no more than 63 characters, or PostgreSQL will do it and emit a warning:
+        application_name = f"{application_name[:60]}..."
+    return application_name
 
 
 # PostgreSQL retry decorator
@@ -74,12 +281,24 @@ class pg_retry(RetryAndBackoff):
         psycopg2.errors.DeadlockDetected,
     )
 
+    @classmethod
+    def backoff(cls, attempt_number: int) -> float:
+        # Deadlocks and failovers tend to hit many clients at once, so spread out the retries.
+        return cls.full_jitter_backoff(attempt_number)
+
+    def handle_exception(self, exc: BaseException, state: RetryState) -> None:
+        # The server may have been restarted or failed over, possibly to a different version.
+        if isinstance(exc, psycopg2.OperationalError) and isinstance(
+            state.method_parent, PostgreSQLAdapter
+        ):
+            state.method_parent.forget_server_version()
+
 
 # PostgreSQL QueryPlan classes
 # =============================================================================
 
 
-@dataclass
+@dataclass(slots=True)
 class PostgreSQLQueryPlanNode(QueryPlanNode):
     """
     PostgreSQL query plan node.
@@ -119,7 +338,37 @@ class PostgreSQLQueryPlanNode(QueryPlanNode):
     nodes: list["PostgreSQLQueryPlanNode"] = field(default_factory=list)
 
 
-@dataclass
+# Mapping of `EXPLAIN (FORMAT JSON)` plan node keys to `PostgreSQLQueryPlanNode` fields:
+_PLAN_NODE_FIELDS = {
+    "Node Type": "type",
+    "Parallel Aware": "parallel_aware",
+    "Startup Cost": "startup_cost",
+    "Total Cost": "total_cost",
+    "Plan Rows": "plan_rows",
+    "Plan Width": "plan_width",
+    "Parent Relationship": "parent_relationship",
+    "Join Type": "join_type",
+    "Function Name": "function_name",
+    "Alias": "alias",
+    "Inner Unique": "inner_unique",
+    "Hash Cond": "hash_cond",
+}
+
+
+def _plan_node(node_dict: dict[str, Any]) -> PostgreSQLQueryPlanNode:
+    """Creates a plan node, without sub-nodes, from an `EXPLAIN (FORMAT JSON)` node object."""
+    # Only pick the keys we have fields for; PostgreSQL emits many more depending on the node
+    # type and server version.
+    return PostgreSQLQueryPlanNode(
+        **{
+            field_name: node_dict[key]
+            for key, field_name in _PLAN_NODE_FIELDS.items()
+            if key in node_dict
+        }
+    )
+
+
+@dataclass(slots=True)
 class PostgreSQLQueryPlan(QueryPlan):
     """
     PostgreSQL query plan.
@@ -142,10 +391,38 @@ class PostgreSQLAdapter(
 ):
     """PostgreSQL database adapter class."""
 
+    database_type = "postgresql"
+
+    # Frames from within these files are skipped when determining the caller for the
+    # connection's `application_name`. Subclass modules are added in `__init_subclass__`.
+    _internal_filenames = frozenset(
+        [
+            __file__,
+            contextlib.__file__,
+            pytools.common.dynamic_namespace.__file__,
+            pytools.common.retry_backoff.__file__,
+            # `pytools.sql` is still being imported here, so refer to the module directly:
+            base.__file__,
+        ]
+    )
+
     TupleCursor: Type[PostgreSQLCursor] = PostgreSQLTupleCursor
-    DictCursor: Type[PostgreSQLCursor] = PostgreSQLDictCursor
     QueryPlan: Type[PostgreSQLQueryPlan] = PostgreSQLQueryPlan
 
+    # Server versions by `(host, port)`, shared across adapter instances:
+    _server_versions: dict[Tuple[str, int], Tuple[int, ...]] = {}
+
+    # Pool shared by all adapters created with `pooled=True`:
+    connection_pool: ConnectionPool[PostgreSQLConnection] = ConnectionPool()
+
+    @class_property
+    def DictCursor(cls) -> Type[PostgreSQLCursor]:  # pylint: disable=invalid-name,no-self-argument
+        return _dict_cursor_class()
+
+    def __init_subclass__(cls, **kwargs: Any) -> None:
+        super().__init_subclass__(**kwargs)
+        cls._internal_filenames = cls._internal_filenames | {sys.modules[cls.__module__].__file__}
+
     def __init__(
         self,
         route: Route,
@@ -153,7 +430,25 @@ class PostgreSQLAdapter(
         autocommit: bool = False,
         cursor_class: Type[PostgreSQLCursor] = PostgreSQLCursor,
         execute_contextmanager: Optional[ExecuteContextManagerFactory] = None,
+        pooled: bool = False,
+        prepare_statements: bool = False,
     ) -> None:
+        """
+        Initialize a PostgreSQL database adapter. See `DatabaseAdapter.__init__` for the common
+        arguments.
+
+        Arguments:
+            pooled: bool -- Whether to reuse idle connections to the same route from
+                `connection_pool` instead of establishing a new connection, and to return the
+                connection to the pool on `close` instead of closing it (default: False).
+            prepare_statements: bool -- Whether to execute `SELECT`, `INSERT`, `UPDATE`,
+                `DELETE`, `VALUES`, and `WITH` statements as server-side prepared statements,
+                so that the server parses and plans each of them only once per connection
+                (default: False). Parameter types are inferred by the server when a statement
+                is prepared, so cast parameters whose type cannot be inferred from the
+                statement, e.g. `SELECT %s::int`. Statements that cannot be prepared are
+                executed as usual.
+        """
         self.cursor_class: Type[PostgreSQLCursor]
         super().__init__(
             route,
@@ -161,56 +456,196 @@ class PostgreSQLAdapter(
             cursor_class=cursor_class,
             execute_contextmanager=execute_contextmanager,
         )
+        self.pooled = pooled
+        self.prepare_statements = prepare_statements
 
         self._server_version: Optional[Tuple[int, ...]] = None
+        # Names of the statements prepared on the current connection, and of those that need
+        # to be prepared anew:
+        self._prepared_statement_names: Set[str] = set()
+        self._stale_prepared_statement_names: Set[str] = set()
 
     @pg_retry()
     def connect(self) -> PostgreSQLConnection:
-        # Convey caller information in PostgreSQL's `application_name` parameter:
-        # <https://www.postgresql.org/docs/12/runtime-config-logging.html#GUC-APPLICATION-NAME>
-        # This makes connections identifiable in the `pg_stat_activity` view.
-        # <https://www.postgresql.org/docs/12/monitoring-stats.html#PG-STAT-ACTIVITY-VIEW>
-        caller = getcaller(
-            # Ignore frames from within this module:
-            ignore_filenames=[__file__],
-            # Ignore frames from within these other modules:
-            ignore_modules=[
-                contextlib,
-                pytools.common.dynamic_namespace,
-                pytools.common.retry_backoff,
-                pytools.sql.adapters.base,
-            ],
-        )
-        caller_filename = relativize_path(caller.filename, sys.path)
-        application_name = f"{caller_filename}:{caller.lineno}:{caller.function}"
-        if len(application_name) > 63:
-            # Shorten to no more than 63 characters, or PostgreSQL will do it and emit a warning:
-            application_name = f"{application_name[:60]}..."
+        # Connections are handed out without prepared statements.
+        self._prepared_statement_names.clear()
+        self._stale_prepared_statement_names.clear()
+        if self.pooled:
+            connection = self.connection_pool.checkout(
+                self._pool_key, self._is_reusable, self._ping
+            )
+            if connection is not None:
+                self._connection = connection
+                self._prepare_pooled_connection(connection)
+                return connection
 
         with self.route.physical_route() as route:
-            kwargs: dict[str, Any] = {
-                "host": route.host,
-                "port": route.port,
-                "user": route.user,
-                "password": route.password,
-                "dbname": route.database,
-                "client_encoding": "utf8",
-                "application_name": application_name,
-                **route.connect_args,
-            }
-            self._connection = psycopg2.connect(**kwargs)
+            self._connection = psycopg2.connect(**self._connect_kwargs(route))
             self._connection.autocommit = self.autocommit
         return self._connection
 
+    def close(self) -> None:
+        if self.pooled and self._connection is not None:
+            connection, self._connection = self._connection, None
+            if connection.closed == 0:
+                try:
+                    # Do not hand out a connection with a pending transaction (this is a no-op
+                    # if there is none), nor with this adapter's session state: settings,
+                    # prepared statements, temporary tables, advisory locks, and `LISTEN`s.
+                    # `DISCARD ALL` cannot run inside a transaction block.
+                    connection.rollback()
+                    connection.autocommit = True
+                    with connection.cursor() as cursor:
+                        cursor.execute("DISCARD ALL")
+                except psycopg2.Error:
+                    # E.g. the server closed the connection; do not return it to the pool.
+                    connection.close()
+                else:
+                    self.connection_pool.checkin(self._pool_key, connection)
+            return
+        super().close()
+
     @property
-    def is_open(self) -> bool:
-        if self._connection is None:
+    def _pool_key(self) -> Tuple:
+        route = self.route
+        return (
+            route.host,
+            route.port,
+            route.user,
+            route.database,
+            tuple(sorted(route.connect_args.items())),
+        )
+
+    @staticmethod
+    def _is_reusable(connection: PostgreSQLConnection) -> bool:
+        return (
+            connection.closed == 0
+            and connection.get_transaction_status() == psycopg2.extensions.TRANSACTION_STATUS_IDLE
+        )
+
+    @staticmethod
+    def _ping(connection: PostgreSQLConnection) -> bool:
+        # The server may have closed a connection that has been idle for a while.
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT 1")
+            connection.rollback()
+        except psycopg2.Error:
             return False
-        return self.connection.closed == 0
+        return True
+
+    def _execute(
+        self,
+        cursor: PostgreSQLCursor,
+        query_string: str,
+        query_params: Optional[QueryParams],
+    ) -> None:
+        # Server-side cursors wrap the statement in a `DECLARE`, which cannot take an `EXECUTE`.
+        if self.prepare_statements and cursor.name is None:
+            prepared = _prepared_statement(query_string, query_params is not None)
+            if prepared is not None and prepared.name not in _unpreparable_statements:
+                values = _prepared_params(prepared, query_params)
+                if values is not None and self._prepare(cursor, prepared):
+                    self._execute_prepared(cursor, prepared, values)
+                    return
+        cursor.execute(query_string, query_params)
+
+    def _prepare(self, cursor: PostgreSQLCursor, prepared: _PreparedStatement) -> bool:
+        """Prepares the given statement, unless it is prepared already. Returns success."""
+        if prepared.name in self._prepared_statement_names:
+            return True
+        statements = [prepared.prepare_statement]
+        if prepared.name in self._stale_prepared_statement_names:
+            statements.insert(0, f"DEALLOCATE {prepared.name}")
+        # A failed statement aborts the transaction, so wrap the statements in a savepoint
+        # unless each statement is its own transaction anyway. All in a single round-trip.
+        savepoint = not cursor.connection.autocommit
+        if savepoint:
+            statements = ["SAVEPOINT pytools_prepare", *statements, "RELEASE pytools_prepare"]
+        try:
+            cursor.execute("; ".join(statements))
+        except psycopg2.Error as e:
+            if isinstance(e, (psycopg2.OperationalError, psycopg2.InterfaceError)):
+                # Not a problem with the statement.
+                raise
+            if savepoint:
+                cursor.execute("ROLLBACK TO pytools_prepare; RELEASE pytools_prepare")
+            if isinstance(e, psycopg2.errors.DuplicatePreparedStatement):
+                # Prepared by an earlier user of the connection. Names are derived from the
+                # statement, so it is the same statement.
+                self._prepared_statement_names.add(prepared.name)
+                return True
+            if isinstance(
+                e,
+                (
+                    psycopg2.errors.SyntaxError,
+                    psycopg2.errors.IndeterminateDatatype,
+                    psycopg2.NotSupportedError,
+                ),
+            ):
+                # The statement may be fine, but cannot be prepared.
+                _unpreparable_statements.add(prepared.name)
+            return False
+        self._stale_prepared_statement_names.discard(prepared.name)
+        self._prepared_statement_names.add(prepared.name)
+        return True
+
+    def _execute_prepared(
+        self, cursor: PostgreSQLCursor, prepared: _PreparedStatement, values: Tuple
+    ) -> None:
+        try:
+            cursor.execute(prepared.execute_statement, values or None)
+        except psycopg2.errors.FeatureNotSupported:
+            # "cached plan must not change result type": the columns of a table the statement
+            # selects from have changed. Prepare it anew next time.
+            self._prepared_statement_names.discard(prepared.name)
+            self._stale_prepared_statement_names.add(prepared.name)
+            raise
+
+    def _prepare_pooled_connection(self, connection: PostgreSQLConnection) -> None:
+        connection.autocommit = True
+        # Convey the new caller like a new connection would. The server reports changes to
+        # `application_name`, so no round-trip is needed to check the current value.
+        application_name = self._application_name()
+        if connection.get_parameter_status("application_name") != application_name:
+            with connection.cursor() as cursor:
+                cursor.execute("SET application_name = %s", (application_name,))
+        connection.autocommit = self.autocommit
+
+    def _application_name(self) -> str:
+        # Convey caller information in PostgreSQL's `application_name` parameter:
+        # <https://www.postgresql.org/docs/12/runtime-config-logging.html#GUC-APPLICATION-NAME>
+        # This makes connections identifiable in the `pg_stat_activity` view.
+        # <https://www.postgresql.org/docs/12/monitoring-stats.html#PG-STAT-ACTIVITY-VIEW>
+        # Walk up the stack to the first frame outside of the adapter internals:
+        internal_filenames = self._internal_filenames
+        frame = sys._getframe(1)  # pylint: disable=protected-access
+        while frame.f_back is not None and frame.f_code.co_filename in internal_filenames:
+            frame = frame.f_back
+        return _format_application_name(frame.f_code, frame.f_lineno)
+
+    def _connect_kwargs(self, route: Route) -> dict[str, Any]:
+        """Returns the connection parameters for the given physical route."""
+        return {
+            "host": route.host,
+            "port": route.port,
+            "user": route.user,
+            "password": route.password,
+            "dbname": route.database,
+            "client_encoding": "utf8",
+            "application_name": self._application_name(),
+            **route.connect_args,
+        }
+
+    @property
+    def is_open(self) -> bool:
+        # Read `_connection` directly; the `connection` property would connect on demand.
+        connection = self._connection
+        return connection is not None and connection.closed == 0
 
     def quote_ident(self, name: str) -> str:
         """Returns a quoted representation of the given identifier."""
-        return psycopg2.extensions.quote_ident(name, self.connection)
+        return _quote_ident(name)
 
     def connection_count_for_database(self, database: Optional[str] = None) -> int:
         if database:
@@ -219,12 +654,20 @@ class PostgreSQLAdapter(
             )
         return self.select_value("SELECT count(*) FROM pg_stat_activity")
 
+    def estimated_row_count(self, table_name: str) -> int:
+        # `reltuples` is updated by `VACUUM`, `ANALYZE`, and `CREATE INDEX`. It is -1 for tables
+        # that have never been vacuumed or analyzed (PostgreSQL 14+).
+        reltuples = self.select_value(
+            "SELECT reltuples FROM pg_class WHERE oid = %s::regclass", (table_name,)
+        )
+        return max(int(reltuples), 0)
+
     def _getvar(self, path: list[str]) -> Any:
-        return self.select_value(f"SHOW {'.'.join(path)}")
+        return self.select_value(_show_statement(tuple(path)))
 
     def _setvar(self, path: list[str], value: Any) -> None:
-        cursor = self.connection.cursor()
-        cursor.execute(f"SET {'.'.join(path)} = %s", (value,))
+        with self.cursor(cursor_class=self.TupleCursor) as cursor:
+            cursor.execute(_set_statement(tuple(path)), (value,))
 
     def getvar(self, name: str) -> Any:  # pylint: disable=useless-super-delegation
         """
@@ -250,41 +693,68 @@ class PostgreSQLAdapter(
         """
         return super().setvar(name, value)
 
-    @cached_property
+    @property
     def server_version(self) -> Optional[Tuple[int, ...]]:
         """
         Returns the server version as a tuple of integers for easy comparison in Python
         code.
 
+        The version is cached across adapter instances connecting to the same server.
+
         For example:
 
         >>> if database_adapter.server_version >= (12, 3):
         ...     # use new feature in PostgreSQL 12.3
         """
+        if self._server_version is None:
+            server_key = (self.route.host, self.route.port)
+            server_version = self._server_versions.get(server_key)
+            if server_version is None:
+                server_version = self._query_server_version()
+                if server_version is None:
+                    return None
+                self._server_versions[server_key] = server_version
+            self._server_version = server_version
+        return self._server_version
+
+    def _query_server_version(self) -> Optional[Tuple[int, ...]]:
         server_version = self.select_value("SHOW server_version")
         if server_version is None:
             return None
-        match = re.match(r"^\d+(?:\.\d+)*", server_version)
-        if match is None:
+        version = _parse_server_version(server_version)
+        if not version:
             raise ResponseError(
                 f"Unable to parse server version from `server_version` variable: {server_version}"
             )
-        self._server_version = tuple(int(part) for part in match[0].split("."))
-        return self._server_version
+        return version
 
-    @cached_property
-    def identifier_quote_char(self) -> str:
-        """Returns the quote character recognized by the database."""
-        return '"'
+    @property
+    def _server_version_num(self) -> int:
+        # The version as reported by the server at connection time, e.g. `120003` for 12.3,
+        # available without a round-trip.
+        # <https://www.psycopg.org/docs/connection.html#connection.server_version>
+        return self.connection.server_version
+
+    def forget_server_version(self) -> None:
+        """Discard the cached server version, e.g. after the server may have been upgraded."""
+        self._server_version = None
+        self._server_versions.pop((self.route.host, self.route.port), None)
+
+    # Constant for PostgreSQL:
+    identifier_quote_char = '"'
 
     @property
     def connection_id(self) -> int:
         """
         Returns the unique ID of the database connection.
 
+        This is the process ID of the server process serving the connection, as returned by
+        `pg_backend_pid()`, but without a round-trip: the server reports it at connection time.
+
         See <https://www.postgresql.org/docs/13/functions-info.html#id-1.5.8.32.4.2.2.11.1.1.1>.
         """
-        return self.select_value("SELECT pg_backend_pid()")
+        # <https://www.psycopg.org/docs/extensions.html#psycopg2.extensions.ConnectionInfo.backend_pid>
+        return self.connection.info.backend_pid
 
     @property
     def transaction_id(self) -> Optional[int]:
@@ -293,7 +763,7 @@ class PostgreSQLAdapter(
 
         See <https://www.postgresql.org/docs/current/functions-info.html#FUNCTIONS-PG-SNAPSHOT>.
         """
-        if self.server_version and self.server_version >= (10, 0):
+        if self._server_version_num >= 100000:
             transaction_id = self.select_value("SELECT txid_current_if_assigned()")
         else:
             transaction_id = self.select_value("SELECT txid_current()")
@@ -301,36 +771,64 @@ class PostgreSQLAdapter(
 
     @property
     def transaction_isolation(self) -> IsolationLevel:
-        transaction_isolation_str = self.vars.transaction_isolation.upper().replace(" ", "_")
-        return IsolationLevel[transaction_isolation_str]
+        return _ISOLATION_LEVEL_BY_SETTING[self.vars.transaction_isolation]
 
     @contextmanager
     @pg_retry()
     def transaction(self, isolation_level: Optional[IsolationLevel] = None) -> Iterator:
-        variables = {}
-        if isolation_level:
-            if self._transaction_level > 0:
+        if self._transaction_level > 0:
+            if isolation_level:
                 raise ValueError(
                     f"isolation_level={isolation_level} specified in nested transaction; "
                     f"allowed only in top-level transaction"
                 )
-            transaction_isolation_str = isolation_level.name.lower().replace("_", " ")
-            variables["transaction_isolation"] = transaction_isolation_str
+            # Nested transactions have no semantics other than incrementing the level, so
+            # there is nothing to tell the server.
+            self._transaction_level += 1
+            try:
+                yield self
+            finally:
+                self._transaction_level -= 1
+            return
+
+        variables = {}
+        if isolation_level:
+            variables["transaction_isolation"] = _ISOLATION_LEVEL_SETTINGS[isolation_level]
 
         with self.setvars(variables):
             try:
                 self._transaction_level += 1
-                if self._transaction_level == 1:
-                    with self.connection:
-                        yield self
-                else:
+                with self._top_level_transaction():
                     yield self
             finally:
                 self._transaction_level -= 1
 
-    def cursor(self, cursor_class: Optional[Type[PostgreSQLCursor]] = None) -> PostgreSQLCursor:
+    @contextmanager
+    def _top_level_transaction(self) -> Iterator:
+        """Commits when the context exits normally, rolls back when it raises."""
+        with self.connection:
+            yield
+
+    def cursor(
+        self, cursor_class: Optional[Type[PostgreSQLCursor]] = None, *, name: Optional[str] = None
+    ) -> PostgreSQLCursor:
+        """
+        Create a database cursor. See `DatabaseAdapter.cursor`.
+
+        Arguments:
+            cursor_class: Type[Cursor] (optional) -- Cursor class to instantiate.
+            name: str (optional) -- If specified, create a server-side cursor with this name,
+                which fetches rows from the server in batches of `cursor.itersize` rows (or as
+                requested by `fetchmany`) rather than all at once. It must be used inside a
+                transaction, unless the adapter is in autocommit mode, in which case it is
+                declared `WITH HOLD`.
+                See <https://www.psycopg.org/docs/usage.html#server-side-cursors>.
+        """
+        cursor_factory = self._concrete_cursor_class(cursor_class or self.cursor_class)
+        if name is None:
+            return self.connection.cursor(cursor_factory=cursor_factory)
         return self.connection.cursor(
-            cursor_factory=self._concrete_cursor_class(cursor_class or self.cursor_class)
+            name, cursor_factory=cursor_factory, withhold=self.connection.autocommit
         )
 
     @pg_retry()
@@ -343,6 +841,165 @@ class PostgreSQLAdapter(
     ) -> None:
         super().execute(cursor, query_string, query_params, **kwargs)
 
+    @pg_retry()
+    def executemany(
+        self,
+        cursor: PostgreSQLCursor,
+        query_string: QueryT,
+        seq_of_params: Iterable[QueryParams],
+        page_size: int = 100,
+    ) -> None:
+        """
+        Execute a statement once for each set of query parameters, without returning results,
+        and without transaction behavior.
+
+        Unlike `cursor.executemany`, which makes one round-trip per set of parameters, this
+        sends the statements to the server in batches of `page_size`.
+
+        The query is not passed through `execute_contextmanager`.
+
+        Arguments:
+            cursor: Cursor -- Cursor to use for execution.
+            query_string: Query | str -- The SQL query to execute.
+            seq_of_params: Iterable[tuple | dict] -- Query parameters for each execution.
+            page_size: int -- Number of statements to send per round-trip (default: 100).
+        """
+        import psycopg2.extras  # pylint: disable=import-outside-toplevel
+
+        # <https://www.psycopg.org/docs/extras.html#psycopg2.extras.execute_batch>
+        psycopg2.extras.execute_batch(
+            cursor, self._query_string(query_string), seq_of_params, page_size=page_size
+        )
+
+    @pg_retry()
+    def insert_values(
+        self,
+        cursor: PostgreSQLCursor,
+        table: str,
+        columns: Sequence[str],
+        rows: Iterable[Sequence[Any]],
+        page_size: int = 1000,
+    ) -> None:
+        """
+        Insert rows into a table using multi-row `INSERT ... VALUES` statements, without
+        transaction behavior.
+
+        This is considerably faster than executing one `INSERT` per row, as up to `page_size`
+        rows are inserted per statement and round-trip.
+
+        The query is not passed through `execute_contextmanager`.
+
+        For example:
+
+        >>> database_adapter.insert_values(cursor, "public.users", ["id", "name"], [(1, "a")])
+
+        Arguments:
+            cursor: Cursor -- Cursor to use for execution.
+            table: str -- Name of the table to insert into, optionally qualified by the schema
+                name. Each part of the name is quoted.
+            columns: Sequence[str] -- Names of the columns to insert into.
+            rows: Iterable[Sequence] -- Values to insert, one sequence per row, in the order of
+                `columns`.
+            page_size: int -- Number of rows to insert per statement (default: 1000).
+        """
+        import psycopg2.extras  # pylint: disable=import-outside-toplevel
+
+        quoted_table = ".".join(map(self.quote_ident, table.split(".")))
+        quoted_columns = ", ".join(map(self.quote_ident, columns))
+        # <https://www.psycopg.org/docs/extras.html#psycopg2.extras.execute_values>
+        psycopg2.extras.execute_values(
+            cursor,
+            f"INSERT INTO {quoted_table} ({quoted_columns}) VALUES %s",
+            rows,
+            page_size=page_size,
+        )
+
+    @pg_retry()
+    def execute_values(
+        self,
+        cursor: PostgreSQLCursor,
+        query_string: QueryT,
+        rows: Iterable[Sequence[Any]],
+        *,
+        template: Optional[str] = None,
+        page_size: int = 1000,
+    ) -> int:
+        """
+        Execute a statement with a single `VALUES %s` placeholder, which is expanded to up to
+        `page_size` rows per statement, without transaction behavior. Other `%` characters in
+        the query must be escaped as `%%`.
+
+        Unlike `insert_values`, this supports any such statement, e.g. an `INSERT` with an
+        `ON CONFLICT` clause.
+
+        The query is not passed through `execute_contextmanager`.
+
+        Arguments:
+            cursor: Cursor -- Cursor to use for execution.
+            query_string: Query | str -- The SQL query to execute.
+            rows: Iterable[Sequence] -- Values to substitute, one sequence per row.
+            template: str (optional) -- Placeholder for each row, e.g. `(%s, %s, 'x')`
+                (default: one `%s` per value).
+            page_size: int -- Number of rows per statement (default: 1000).
+
+        Returns:
+            Total number of rows affected.
+        """
+        import psycopg2.extras  # pylint: disable=import-outside-toplevel
+
+        query_string = self._query_string(query_string)
+        row_iterator = iter(rows)
+        affected_rows = 0
+        for page in iter(lambda: list(itertools.islice(row_iterator, page_size)), []):
+            # <https://www.psycopg.org/docs/extras.html#psycopg2.extras.execute_values>
+            psycopg2.extras.execute_values(
+                cursor, query_string, page, template=template, page_size=page_size
+            )
+            affected_rows += cursor.rowcount
+        return affected_rows
+
+    # Formats supported by `COPY`: <https://www.postgresql.org/docs/current/sql-copy.html>
+    COPY_FORMATS = ("binary", "csv", "text")
+
+    def select_copy(
+        self,
+        query_string: QueryT,
+        query_params: Optional[QueryParams] = None,
+        *,
+        file: IO,
+        copy_format: str = "binary",
+    ) -> None:
+        """
+        Execute a `SELECT` statement and write the results to the given file using PostgreSQL's
+        `COPY ... TO STDOUT`, without transaction behavior.
+
+        For bulk exports this is considerably faster than fetching rows through a cursor, as
+        rows are streamed in `COPY` format and never converted to Python objects.
+
+        `COPY` does not support query parameters, so parameters are merged into the query
+        string on the client side first. The query is not passed through
+        `execute_contextmanager`.
+
+        Arguments:
+            query_string: Query | str -- The SQL query to execute.
+            query_params: tuple | dict (optional) -- Query parameters.
+            file: IO -- File-like object to write the results to. Must be opened in binary
+                mode for the `binary` format.
+            copy_format: str -- `COPY` format to use: `binary` (default), `csv`, or `text`.
+        """
+        if copy_format not in self.COPY_FORMATS:
+            raise ValueError(f"Unsupported COPY format: {copy_format}")
+        query_string = self._query_string(query_string)
+        cursor = self.cursor(cursor_class=self.TupleCursor)
+        try:
+            if query_params is not None:
+                query_string = cursor.mogrify(query_string, query_params).decode()
+            cursor.copy_expert(
+                f"COPY ({query_string}) TO STDOUT WITH (FORMAT {copy_format})", file
+            )
+        finally:
+            cursor.close()
+
     def found_rows(self) -> int:
         """Not supported by PostgreSQL."""
         # MySQL's `found_rows()` ignores `LIMIT` and calculates the theoretical total number of
@@ -366,25 +1023,22 @@ class PostgreSQLAdapter(
         representation of the plan. See `PostgreSQLQueryPlan` for details.
         """
         query_string = self._query_string(query_string)
+        # psycopg2 decodes the `json` result column, so no parsing is needed on our side.
         result = self.select_value(f"EXPLAIN (FORMAT JSON) {query_string}", query_params)
         root_node = result[0]["Plan"]
 
-        def parse_node(node_dict: dict[str, Any]) -> PostgreSQLQueryPlanNode:
-            def normalize_key(key: str) -> str:
-                key = key.lower().replace(" ", "_")
-                if key == "node_type":
-                    key = "type"
-                return key
-
-            node_dict = {normalize_key(key): value for key, value in node_dict.items()}
-            if "plans" in node_dict:
-                node_dict["plans"] = [
-                    parse_node(subnode_dict) for subnode_dict in node_dict["plans"]
-                ]
-            return PostgreSQLQueryPlanNode(**node_dict)
-
-        query_plan = PostgreSQLQueryPlan(node=parse_node(root_node))
-        return query_plan
+        # Build the tree of nodes with an explicit worklist instead of recursing, as plans of
+        # complex queries can be large and deeply nested.
+        root = _plan_node(root_node)
+        worklist = [(root_node, root)]
+        while worklist:
+            node_dict, node = worklist.pop()
+            for subnode_dict in node_dict.get("Plans", ()):
+                subnode = _plan_node(subnode_dict)
+                node.nodes.append(subnode)
+                worklist.append((subnode_dict, subnode))
+
+        return PostgreSQLQueryPlan(node=root)
 
     def cancel(self) -> None:
         """
@@ -0,0 +1,529 @@
+"""
+Low-level operations on PostgreSQL databases using the `psycopg` (v3) driver.
+
+Behaves like `pytools.sql.adapters.postgresql.PostgreSQLAdapter` (which uses `psycopg2`), and
+additionally supports pipeline mode and `asyncio`:
+- `pipeline()` batches the statements executed inside the context into as few network
+  round-trips as possible. `select_many()` uses it to run independent queries in a single
+  round-trip.
+- `aexecute()`/`aselect()`/`aselect_row()`/`aselect_iter()` run statements on a separate
+  `psycopg.AsyncConnection`.
+
+`psycopg` is an optional dependency, so this module is not imported by
+`pytools.sql.adapters`; import it explicitly instead.
+"""
+
+import itertools
+from contextlib import contextmanager
+from typing import (
+    IO,
+    Any,
+    AsyncIterator,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    Type,
+)
+
+import psycopg
+import psycopg.errors
+import psycopg.rows
+
+from pytools.common.class_utils import cached_property
+from pytools.common.retry_backoff import RetryAndBackoff
+
+from ..query import QueryT
+from ..route import Route
+from .base import ExecuteContextManagerFactory, QueryParams
+from .postgresql import PostgreSQLAdapter
+
+# Types
+# =============================================================================
+
+# <https://www.psycopg.org/psycopg3/docs/api/connections.html>
+PostgreSQLConnectionV3 = psycopg.Connection
+PostgreSQLAsyncConnectionV3 = psycopg.AsyncConnection
+
+
+# Client-side-binding cursors merge query parameters into the query string like `psycopg2` does.
+# Unlike server-side binding, this allows parameters in statements like `SET name = %s`, and
+# provides `mogrify`.
+# <https://www.psycopg.org/psycopg3/docs/advanced/cursors.html#client-side-binding-cursors>
+class PostgreSQLTupleCursorV3(psycopg.ClientCursor):
+    """Cursor returning rows as tuples."""
+
+    default_row_factory = staticmethod(psycopg.rows.tuple_row)
+
+    def __init__(self, connection: PostgreSQLConnectionV3, *, row_factory: Any = None) -> None:
+        super().__init__(connection, row_factory=row_factory or self.default_row_factory)
+
+
+class PostgreSQLDictCursorV3(PostgreSQLTupleCursorV3):
+    """Cursor returning rows as dicts."""
+
+    default_row_factory = staticmethod(psycopg.rows.dict_row)
+
+
+PostgreSQLCursorV3 = PostgreSQLTupleCursorV3
+
+
+# PostgreSQL retry decorator
+# =============================================================================
+
+
+class pg3_retry(RetryAndBackoff):
+    default_exceptions = (
+        # <https://www.psycopg.org/psycopg3/docs/api/errors.html>
+        psycopg.InterfaceError,
+        psycopg.OperationalError,
+        #
+        # Retry only on very specific exceptions where a retry is actually likely to succeed.
+        #
+        # `DatabaseError` subclasses:
+        psycopg.errors.ConnectionException,
+        psycopg.errors.SqlclientUnableToEstablishSqlconnection,
+        psycopg.errors.ConnectionDoesNotExist,
+        psycopg.errors.SqlserverRejectedEstablishmentOfSqlconnection,
+        psycopg.errors.ConnectionFailure,
+        #
+        # `OperationalError` subclasses:
+        psycopg.errors.DeadlockDetected,
+    )
+
+    @classmethod
+    def backoff(cls, attempt_number: int) -> float:
+        # See `pg_retry.backoff`.
+        return cls.full_jitter_backoff(attempt_number)
+
+
+# PostgreSQL adapter class
+# =============================================================================
+
+
+class PostgreSQLAdapterV3(PostgreSQLAdapter):
+    """PostgreSQL database adapter class using the `psycopg` (v3) driver."""
+
+    TupleCursor: Type[PostgreSQLCursorV3] = PostgreSQLTupleCursorV3  # type: ignore
+    DictCursor: Type[PostgreSQLCursorV3] = PostgreSQLDictCursorV3  # type: ignore
+
+    def __init__(
+        self,
+        route: Route,
+        *,
+        autocommit: bool = False,
+        cursor_class: Type[PostgreSQLCursorV3] = PostgreSQLCursorV3,
+        execute_contextmanager: Optional[ExecuteContextManagerFactory] = None,
+        pooled: bool = False,
+        prepare_statements: bool = False,
+    ) -> None:
+        """
+        Initialize a PostgreSQL database adapter. See `DatabaseAdapter.__init__` for the common
+        arguments.
+
+        `pooled` and `prepare_statements` are accepted for compatibility with
+        `PostgreSQLAdapter`, but are not supported.
+        """
+        if pooled or prepare_statements:
+            raise ValueError(
+                "Connection pooling and prepared statements are not supported by "
+                f"{self.__class__.__name__}"
+            )
+        super().__init__(
+            route,
+            autocommit=autocommit,
+            cursor_class=cursor_class,  # type: ignore
+            execute_contextmanager=execute_contextmanager,
+        )
+        self._async_connection: Optional[PostgreSQLAsyncConnectionV3] = None
+
+    @pg3_retry()
+    def connect(self) -> PostgreSQLConnectionV3:  # type: ignore
+        with self.route.physical_route() as route:
+            self._connection = psycopg.connect(
+                **self._connect_kwargs(route), autocommit=self.autocommit
+            )
+        return self._connection
+
+    @property
+    def is_open(self) -> bool:
+        connection = self._connection
+        return connection is not None and not connection.closed
+
+    @cached_property
+    def server_version(self) -> Optional[Tuple[int, ...]]:
+        """
+        Returns the server version as a tuple of integers for easy comparison in Python
+        code.
+
+        Unlike with `psycopg2`, this does not need a round-trip: `psycopg` exposes the version
+        reported by the server at connection time.
+        """
+        version = self._server_version_num
+        if version >= 100000:
+            # PostgreSQL 10+: major * 10000 + minor
+            self._server_version = (version // 10000, version % 10000)
+        else:
+            # Older: major * 10000 + minor * 100 + patch
+            self._server_version = (version // 10000, version // 100 % 100, version % 100)
+        return self._server_version
+
+    @property
+    def _server_version_num(self) -> int:
+        # <https://www.psycopg.org/psycopg3/docs/api/objects.html#psycopg.ConnectionInfo.server_version>
+        return self.connection.info.server_version
+
+    @contextmanager
+    def _top_level_transaction(self) -> Iterator:
+        """Commits when the context exits normally, rolls back when it raises."""
+        # Unlike with `psycopg2`, `with connection` closes the connection, and
+        # `connection.transaction()` only opens a savepoint if a transaction has already been
+        # started implicitly (e.g. by `setvars`). So commit/roll back explicitly, same as
+        # `psycopg2`'s `with connection` does.
+        try:
+            yield
+        except BaseException:
+            self.connection.rollback()
+            raise
+        else:
+            self.connection.commit()
+
+    @contextmanager
+    def pipeline(self) -> Iterator:
+        """
+        Execute a context in pipeline mode: statements executed during the context are sent to
+        the server without waiting for the results of preceding statements. Results are
+        fetched when they are first needed, or when the context is exited.
+
+        Use this for independent statements, such as a series of `INSERT`s. Statements that
+        fail do not raise until their results are synchronized.
+
+        Nestable.
+
+        For example:
+
+        >>> with database_adapter.pipeline():
+        ...     for query_params in rows:
+        ...         database_adapter.execute(cursor, "INSERT ...", query_params)
+
+        See <https://www.psycopg.org/psycopg3/docs/advanced/pipeline.html>.
+        """
+        with self.connection.pipeline():
+            yield self
+
+    def cursor(  # type: ignore
+        self, cursor_class: Optional[Type[PostgreSQLCursorV3]] = None, *, name: Optional[str] = None
+    ) -> PostgreSQLCursorV3:
+        # `psycopg`'s server-side cursors bind parameters on the server and provide no
+        # `mogrify`, unlike the client-side-binding cursors above, so `name` is ignored and rows
+        # are fetched all at once.
+        concrete_cursor_class = self._concrete_cursor_class(cursor_class or self.cursor_class)
+        return concrete_cursor_class(self.connection)
+
+    @pg3_retry()
+    def execute(  # type: ignore
+        self,
+        cursor: PostgreSQLCursorV3,
+        query_string: QueryT,
+        query_params: Optional[QueryParams] = None,
+        **kwargs: Any,
+    ) -> None:
+        super(PostgreSQLAdapter, self).execute(cursor, query_string, query_params, **kwargs)
+
+    def select_many(  # type: ignore
+        self,
+        queries: Iterable[Tuple[QueryT, Optional[QueryParams]]],
+        *,
+        cursor_class: Optional[Type[PostgreSQLCursorV3]] = None,
+        **kwargs: Any,
+    ) -> List[Sequence[Any]]:
+        """
+        Execute a number of independent statements, returning the results of each, without
+        transaction behavior.
+
+        All statements are submitted in pipeline mode and synchronized once, so this takes a
+        single round-trip regardless of the number of statements.
+
+        Arguments:
+            queries: Iterable[tuple] -- Pairs of query string and query parameters (or
+                `None`).
+            cursor_class: Type[Cursor] -- Cursor class to use for fetching results.
+
+        Returns:
+            Results of each statement, in the order of `queries`.
+        """
+        cursors: List[PostgreSQLCursorV3] = []
+        try:
+            with self.pipeline():
+                for query_string, query_params in queries:
+                    cursor = self.cursor(cursor_class=cursor_class)
+                    cursors.append(cursor)
+                    self.execute(cursor, query_string, query_params, **kwargs)
+            # Exiting the pipeline has synchronized all results, so fetching is local.
+            return [list(cursor.fetchall()) for cursor in cursors]
+        finally:
+            for cursor in cursors:
+                cursor.close()
+
+    @pg3_retry()
+    def executemany(  # type: ignore
+        self,
+        cursor: PostgreSQLCursorV3,
+        query_string: QueryT,
+        seq_of_params: Iterable[QueryParams],
+        page_size: int = 100,
+    ) -> None:
+        """
+        Execute a statement once for each set of query parameters, without returning results,
+        and without transaction behavior.
+
+        `psycopg` already sends the statements in pipeline mode, so `page_size` is ignored.
+        """
+        # <https://www.psycopg.org/psycopg3/docs/api/cursors.html#psycopg.Cursor.executemany>
+        cursor.executemany(self._query_string(query_string), seq_of_params)
+
+    @pg3_retry()
+    def insert_values(  # type: ignore
+        self,
+        cursor: PostgreSQLCursorV3,
+        table: str,
+        columns: Sequence[str],
+        rows: Iterable[Sequence[Any]],
+        page_size: int = 1000,
+    ) -> None:
+        """
+        Insert rows into a table, without transaction behavior. See
+        `PostgreSQLAdapter.insert_values`.
+
+        Rows are inserted with one pipelined `INSERT` per row, so `page_size` is ignored.
+        """
+        quoted_table = ".".join(map(self.quote_ident, table.split(".")))
+        quoted_columns = ", ".join(map(self.quote_ident, columns))
+        placeholders = ", ".join(["%s"] * len(columns))
+        cursor.executemany(
+            f"INSERT INTO {quoted_table} ({quoted_columns}) VALUES ({placeholders})", rows
+        )
+
+    @pg3_retry()
+    def execute_values(  # type: ignore
+        self,
+        cursor: PostgreSQLCursorV3,
+        query_string: QueryT,
+        rows: Iterable[Sequence[Any]],
+        *,
+        template: Optional[str] = None,
+        page_size: int = 1000,
+    ) -> int:
+        """
+        Execute a statement with a single `VALUES %s` placeholder, which is expanded to up to
+        `page_size` rows per statement, without transaction behavior. See
+        `PostgreSQLAdapter.execute_values`.
+        """
+        query_string = self._query_string(query_string)
+        head, placeholder, tail = query_string.partition("%s")
+        if not placeholder or "%s" in tail:
+            raise ValueError("Query must contain exactly one %s placeholder")
+        row_iterator = iter(rows)
+        affected_rows = 0
+        for page in iter(lambda: list(itertools.islice(row_iterator, page_size)), []):
+            row_template = template or f"({', '.join(['%s'] * len(page[0]))})"
+            cursor.execute(
+                head + ", ".join([row_template] * len(page)) + tail,
+                [value for row in page for value in row],
+            )
+            affected_rows += cursor.rowcount
+        return affected_rows
+
+    def select_copy(
+        self,
+        query_string: QueryT,
+        query_params: Optional[QueryParams] = None,
+        *,
+        file: IO,
+        copy_format: str = "binary",
+    ) -> None:
+        """
+        Execute a `SELECT` statement and write the results to the given file using PostgreSQL's
+        `COPY ... TO STDOUT`, without transaction behavior.
+
+        Query parameters are merged into the query string on the client side. The query is not
+        passed through `execute_contextmanager`.
+
+        Arguments:
+            query_string: Query | str -- The SQL query to execute.
+            query_params: tuple | dict (optional) -- Query parameters.
+            file: IO -- File-like object to write the results to. Must be opened in binary
+                mode.
+            copy_format: str -- `COPY` format to use: `binary` (default), `csv`, or `text`.
+        """
+        if copy_format not in self.COPY_FORMATS:
+            raise ValueError(f"Unsupported COPY format: {copy_format}")
+        query_string = self._query_string(query_string)
+        with self.cursor(cursor_class=self.TupleCursor) as cursor:
+            # <https://www.psycopg.org/psycopg3/docs/basic/copy.html>
+            with cursor.copy(
+                f"COPY ({query_string}) TO STDOUT WITH (FORMAT {copy_format})", query_params
+            ) as copy:
+                for data in copy:
+                    file.write(data)
+
+    # Asynchronous methods
+    # =========================================================================
+
+    async def aconnect(self) -> PostgreSQLAsyncConnectionV3:
+        """
+        Establish a fresh asynchronous database connection. The asynchronous connection is
+        separate from the one returned by `connect`; the two do not share transactions.
+
+        Returns:
+            Asynchronous database connection.
+        """
+        if self.route.expired:
+            self.route.refresh_iam_token()
+        with self.route.physical_route() as route:
+            self._async_connection = await psycopg.AsyncConnection.connect(
+                **self._connect_kwargs(route),
+                autocommit=self.autocommit,
+                cursor_factory=psycopg.AsyncClientCursor,
+            )
+        return self._async_connection
+
+    async def aclose(self) -> None:
+        """Close asynchronous database connection if one has been opened."""
+        if self._async_connection is not None:
+            await self._async_connection.close()
+            self._async_connection = None
+
+    async def _aexecute(
+        self,
+        cursor: psycopg.AsyncCursor,
+        query_string: QueryT,
+        query_params: Optional[QueryParams] = None,
+        **kwargs: Any,
+    ) -> None:
+        query_string = self._query_string(query_string)
+        if self.execute_contextmanager:
+            with self.execute_contextmanager(cursor, query_string, query_params, **kwargs) as (
+                # These may be updated by `execute_contextmanager`:
+                new_query_string,
+                new_query_params,
+            ):
+                await cursor.execute(new_query_string, new_query_params)
+        else:
+            await cursor.execute(query_string, query_params)
+
+    async def aexecute(
+        self,
+        query_string: QueryT,
+        query_params: Optional[QueryParams] = None,
+        **kwargs: Any,
+    ) -> None:
+        """
+        Asynchronously execute a statement without returning results.
+
+        Connects on first use. Unlike the synchronous methods, this does not retry on failure.
+
+        Arguments:
+            query_string: Query | str -- The SQL query to execute.
+            query_params: tuple | dict (optional) -- Query parameters.
+        """
+        connection = self._async_connection or await self.aconnect()
+        async with connection.cursor() as cursor:
+            await self._aexecute(cursor, query_string, query_params, **kwargs)
+
+    async def aselect(
+        self,
+        query_string: QueryT,
+        query_params: Optional[QueryParams] = None,
+        *,
+        cursor_class: Optional[Type[PostgreSQLCursorV3]] = None,
+        **kwargs: Any,
+    ) -> Sequence[Any]:
+        """
+        Asynchronously execute a statement, returning results.
+
+        Connects on first use. Unlike the synchronous methods, this does not retry on failure.
+
+        Arguments:
+            query_string: Query | str -- The SQL query to execute.
+            query_params: tuple | dict (optional) -- Query parameters.
+            cursor_class: Type[Cursor] -- Cursor class whose row type to use for the results.
+        """
+        connection = self._async_connection or await self.aconnect()
+        cursor_class = self._concrete_cursor_class(cursor_class or self.cursor_class)
+        async with connection.cursor(row_factory=cursor_class.default_row_factory) as cursor:
+            await self._aexecute(cursor, query_string, query_params, **kwargs)
+            return await cursor.fetchall()
+
+    async def aselect_row(
+        self,
+        query_string: QueryT,
+        query_params: Optional[QueryParams] = None,
+        *,
+        cursor_class: Optional[Type[PostgreSQLCursorV3]] = None,
+        **kwargs: Any,
+    ) -> Optional[Any]:
+        """
+        Asynchronously execute a statement, returning one row, or `None` if there are none.
+
+        Connects on first use. Unlike the synchronous methods, this does not retry on failure.
+
+        Arguments:
+            query_string: Query | str -- The SQL query to execute.
+            query_params: tuple | dict (optional) -- Query parameters.
+            cursor_class: Type[Cursor] -- Cursor class whose row type to use for the result.
+        """
+        connection = self._async_connection or await self.aconnect()
+        cursor_class = self._concrete_cursor_class(cursor_class or self.cursor_class)
+        async with connection.cursor(row_factory=cursor_class.default_row_factory) as cursor:
+            await self._aexecute(cursor, query_string, query_params, **kwargs)
+            return await cursor.fetchone()
+
+    async def aselect_iter(
+        self,
+        query_string: QueryT,
+        query_params: Optional[QueryParams] = None,
+        *,
+        cursor_class: Optional[Type[PostgreSQLCursorV3]] = None,
+        batch_size: Optional[int] = None,
+        fetch_batch_size: Optional[int] = None,
+        **kwargs: Any,
+    ) -> AsyncIterator[Any]:
+        """
+        Asynchronously execute a statement, yielding one row or a batch of rows at a time.
+        See `select_iter` for the meaning of `batch_size` and `fetch_batch_size`.
+
+        Connects on first use. Unlike the synchronous methods, this does not retry on failure.
+
+        Arguments:
+            query_string: Query | str -- The SQL query to execute.
+            query_params: tuple | dict (optional) -- Query parameters.
+            cursor_class: Type[Cursor] -- Cursor class whose row type to use for the results.
+            batch_size: int (optional) -- Yield lists of this many rows at a time, instead of
+                single rows.
+            fetch_batch_size: int (optional) -- Fetch this many rows at a time (default:
+                same as `batch_size`, at least 1).
+        """
+        connection = self._async_connection or await self.aconnect()
+        cursor_class = self._concrete_cursor_class(cursor_class or self.cursor_class)
+        fetch_batch_size = fetch_batch_size or batch_size or 1
+        async with connection.cursor(row_factory=cursor_class.default_row_factory) as cursor:
+            await self._aexecute(cursor, query_string, query_params, **kwargs)
+            buffer: List[Any] = []
+            while True:
+                rows = await cursor.fetchmany(fetch_batch_size)
+                if batch_size:
+                    buffer.extend(rows)
+                    while len(buffer) >= batch_size:
+                        yield buffer[:batch_size]
+                        del buffer[:batch_size]
+                else:
+                    for row in rows:
+                        yield row
+                if len(rows) < fetch_batch_size:
+                    break
+            if buffer:
+                # Yield the remaining rows that do not make up a whole batch.
+                yield buffer
@@ -0,0 +1,157 @@
+"""
+`asyncio` variant of `pytools.sql.sql_connect.SQLConnect`, using the `psycopg` (v3) driver.
+
+`AsyncSQLConnect` provides all of `SQLConnect`'s synchronous methods, and additionally
+coroutine versions of the basic statement methods (`aexecute`, `aselect`, `aselect_row`,
+`aselect_value`, `aselect_iter`). These run on a separate asynchronous connection, so that an
+event loop is not blocked while waiting for the database, and share `SQLConnect`'s query
+templates, identifier quoting, and debug logging.
+
+A connection runs one statement at a time. To run statements concurrently, use one
+`AsyncSQLConnect` object per concurrent task.
+
+`psycopg` is an optional dependency, so this module is not imported by `pytools.sql`; import it
+explicitly instead.
+
+For example:
+
+>>> async with AsyncSQLConnect(route).aopen() as sql_connect:
+...     async for row in sql_connect.aselect_iter("SELECT ...", fetch_batch_size=1000):
+...         ...
+"""
+
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Optional, Sequence, Type, TypeVar
+
+from pytools.common.doc_utils import documented_by
+
+from .adapters.base import QueryParams
+from .adapters.postgresql_v3 import PostgreSQLAdapterV3
+from .pep249 import Cursor
+from .query import QueryT
+from .route import Route
+from .sql_connect import SQLConnect
+
+_S = TypeVar("_S", bound="AsyncSQLConnect")
+
+
+class AsyncSQLConnect(SQLConnect):
+    """Provides synchronous and `asyncio` access to a PostgreSQL database. See `SQLConnect`."""
+
+    adapter: PostgreSQLAdapterV3
+
+    def __init__(
+        self,
+        route: Route,
+        *,
+        autocommit: bool = False,
+        cursor_class: Optional[Type[Cursor]] = None,
+        adapter_class: Type[PostgreSQLAdapterV3] = PostgreSQLAdapterV3,
+        **kwargs: Any,
+    ) -> None:
+        """
+        Create an `AsyncSQLConnect` object based on the route given. See `SQLConnect.__init__`.
+
+        Arguments:
+            adapter_class -- Database adapter class to use; must support `asyncio`
+                (default: `PostgreSQLAdapterV3`).
+        """
+        if not issubclass(adapter_class, PostgreSQLAdapterV3):
+            raise TypeError(f"{adapter_class.__name__} does not support asyncio")
+        super().__init__(
+            route,
+            autocommit=autocommit,
+            cursor_class=cursor_class,
+            adapter_class=adapter_class,
+            **kwargs,
+        )
+
+    @classmethod
+    @documented_by(SQLConnect.from_config)
+    def from_config(cls, *args: Any, **kwargs: Any) -> "AsyncSQLConnect":
+        kwargs.setdefault("adapter_class", PostgreSQLAdapterV3)
+        return super().from_config(*args, **kwargs)  # type: ignore
+
+    @asynccontextmanager
+    async def aopen(self: _S, close: bool = True) -> AsyncIterator[_S]:
+        """
+        Asynchronous context manager that automatically opens an asynchronous database
+        connection before entering the context and optionally closes it after exiting the
+        context.
+
+        Arguments:
+            close: `bool` controlling whether to close connection when exiting context
+                (default: True).
+        """
+        await self.adapter.aconnect()
+        try:
+            yield self
+        except Exception as e:
+            self.logger.exception(e)
+            raise
+        finally:
+            if close:
+                await self.adapter.aclose()
+
+    @documented_by(PostgreSQLAdapterV3.aexecute)
+    async def aexecute(
+        self, query_string: QueryT, query_params: Optional[QueryParams] = None
+    ) -> None:
+        await self.adapter.aexecute(query_string, query_params)
+
+    @documented_by(PostgreSQLAdapterV3.aselect)
+    async def aselect(
+        self,
+        query_string: QueryT,
+        query_params: Optional[QueryParams] = None,
+        *,
+        cursor_class: Type[Cursor] = None,
+    ) -> Sequence[Any]:
+        return await self.adapter.aselect(query_string, query_params, cursor_class=cursor_class)
+
+    @documented_by(PostgreSQLAdapterV3.aselect_row)
+    async def aselect_row(
+        self,
+        query_string: QueryT,
+        query_params: Optional[QueryParams] = None,
+        *,
+        cursor_class: Type[Cursor] = None,
+    ) -> Any:
+        return await self.adapter.aselect_row(
+            query_string, query_params, cursor_class=cursor_class
+        )
+
+    async def aselect_value(
+        self, query_string: QueryT, query_params: Optional[QueryParams] = None
+    ) -> Any:
+        """
+        Asynchronously execute a statement, returning the first column of the first row, or
+        `None` if there are no rows.
+
+        Arguments:
+            query_string: Query | str -- The SQL query to execute.
+            query_params: tuple | dict (optional) -- Query parameters.
+        """
+        row = await self.adapter.aselect_row(
+            query_string, query_params, cursor_class=self.adapter.TupleCursor
+        )
+        return row[0] if row is not None else None
+
+    @documented_by(PostgreSQLAdapterV3.aselect_iter)
+    async def aselect_iter(
+        self,
+        query_string: QueryT,
+        query_params: Optional[QueryParams] = None,
+        *,
+        cursor_class: Type[Cursor] = None,
+        batch_size: Optional[int] = None,
+        fetch_batch_size: Optional[int] = None,
+    ) -> AsyncIterator[Any]:
+        async for row in self.adapter.aselect_iter(
+            query_string,
+            query_params,
+            cursor_class=cursor_class,
+            batch_size=batch_size,
+            fetch_batch_size=fetch_batch_size,
+        ):
+            yield row
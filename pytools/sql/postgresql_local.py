@@ -59,10 +59,16 @@ def _init_postgresql_container(_route: Route, _container: DockerContainer) -> No
 def _init_postgresql_database(route: Route) -> None:
     nodb_route = route.replace(database=None)
     nodb_sql_connect = SQLConnect(nodb_route, autocommit=True)
-    try:
-        nodb_sql_connect.execute(f"CREATE DATABASE {route.database}")
-    except psycopg2.errors.DuplicateDatabase:
-        pass
+    with nodb_sql_connect.open():
+        # The database usually exists already, so check first rather than making the server
+        # raise (and log) an error.
+        if not nodb_sql_connect.select_value(
+            "SELECT 1 FROM pg_database WHERE datname = %s", (route.database,)
+        ):
+            try:
+                nodb_sql_connect.execute(f"CREATE DATABASE {route.database}")
+            except psycopg2.errors.DuplicateDatabase:
+                pass
     sql_connect = SQLConnect(route, autocommit=True)
     with sql_connect.open():
         sql_connect.execute("CREATE EXTENSION IF NOT EXISTS pgcrypto")
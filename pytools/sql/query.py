@@ -1,10 +1,23 @@
-from inspect import cleandoc as trim
+import functools
+from inspect import cleandoc
 from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple, Union
 
 
 # TODO: Do we even need this module??
 
 
+@functools.lru_cache(maxsize=2048)
+def trim(query_string: str) -> str:
+    """
+    Removes indentation from a query string, like `inspect.cleandoc`. Query strings are mostly
+    constants that are used over and over, so cache the results.
+    """
+    if "\n" not in query_string:
+        # This is what `cleandoc` amounts to for a single line.
+        return query_string.expandtabs().lstrip()
+    return cleandoc(query_string)
+
+
 class Query:
     """
     Representation of a query string for PostgreSQL.
@@ -12,6 +25,10 @@ class Query:
 
     database_type = "postgresql"
 
+    # Queries are often created in large numbers (e.g. one per `read_query` call), so avoid the
+    # overhead of a per-instance `__dict__`:
+    __slots__ = ("_query_string", "rendered", "_items")
+
     def __init__(
         self,
         query_string: Optional[str] = None,
@@ -25,7 +42,7 @@ class Query:
 
         ```
         Query("SELECT 'any' AS foo")
-        Query(build=lambda dt: f"SELECT '{dt.name.lower()}' AS foo")
+        Query(build=lambda database_type: f"SELECT '{database_type}' AS foo")
         ```
 
         Arguments:
@@ -34,6 +51,12 @@ class Query:
                 `build` argument should not be specified.
             build: Callable (optional) -- Dynamically build the query string
         """
+        self._query_string: Dict[str, str] = {}
+        # The query string for `database_type`, resolved once here so that adapters can read
+        # it directly instead of looking it up on every execution:
+        self.rendered: Optional[str] = None
+        # `(database_type, query_string)` pairs, materialized on first iteration:
+        self._items: Optional[Tuple[Tuple[str, str], ...]] = None
 
         self._build(query_string, build)
 
@@ -42,29 +65,33 @@ class Query:
         query_string: Optional[str],
         build: Optional[Callable[[str], Optional[str]]],
     ) -> None:
+        if not query_string and build:
+            query_string = build(self.database_type)
         if query_string:
-            self._query_string = {self.database_type: trim(query_string)}
-        elif build:
-            query_string = build()
-            if query_string is not None:
-                self._query_string = query_string
+            self[self.database_type] = query_string
 
     def __bool__(self) -> bool:
         return bool(self._query_string)
 
-    def __contains__(self) -> bool:
-        return None in self._query_string
+    def __contains__(self, database_type: str) -> bool:
+        return database_type in self._query_string
 
-    def __getitem__(self) -> str:
-        return self._query_string[self.database_type]
+    def __getitem__(self, database_type: str) -> str:
+        return self._query_string[database_type]
 
-    def __setitem__(self, query_string: str) -> None:
+    def __setitem__(self, database_type: str, query_string: str) -> None:
         if not isinstance(query_string, str):
             raise ValueError(f"Value must be str, got: {query_string!r}")
-        self._query_string[self.database_type] = trim(query_string)
-
-    def __iter__(self) -> Iterator[Tuple[Optional[str], str]]:
-        return iter(self._query_string.items())
+        self._query_string[database_type] = trim(query_string)
+        self._items = None
+        if database_type == self.database_type:
+            self.rendered = self._query_string[database_type]
+
+    def __iter__(self) -> Iterator[Tuple[str, str]]:
+        # Query strings are set once and iterated over many times, so keep the pairs around.
+        if self._items is None:
+            self._items = tuple(self._query_string.items())
+        return iter(self._items)
 
     def __eq__(self, other: Any) -> bool:
         return isinstance(other, Query) and self._query_string == other._query_string
@@ -3,14 +3,32 @@
 from __future__ import annotations
 
 import binascii
+import copy
 import os
+import re
+import threading
 import time
 import urllib.parse
 from contextlib import contextmanager
-from types import ModuleType
-from typing import TYPE_CHECKING, Any, Dict, Iterator, Optional, Union, cast
+from types import MappingProxyType, ModuleType
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Callable,
+    Dict,
+    Iterator,
+    Mapping,
+    Optional,
+    Sequence,
+    Tuple,
+    Union,
+    cast,
+)
 
 import psycopg2
+from botocore.credentials import JSONFileCache
+from botocore.exceptions import UnknownCredentialError
+from botocore.session import Session as BotocoreSession
 
 from pytools.aws.boto3_session_generator import Boto3Session, Boto3SessionGenerator
 from pytools.aws.ssm_connect import SsmConnect
@@ -20,12 +38,177 @@ from pytools.resources import CA_CERT_FILENAME
 if TYPE_CHECKING:
     from pytools.app.configs import Configs
 
+    from .ssh_forwarder import SSHForwarder
+
 from .ssh_tunnel import PortForward, SSHTunnel  # pylint: disable=wrong-import-position
 
 
+# Values of boolean environment variables that count as true (lowercase):
+_TRUTHY = frozenset({"1", "true", "yes", "on", "y", "t"})
+
+# Credential cache directory used by the AWS CLI:
+_AWS_CLI_CACHE_DIR = os.path.expanduser(os.path.join("~", ".aws", "cli", "cache"))
+
+# Environment variable opting in to sharing the AWS CLI's credential cache:
+_SHARE_AWS_CLI_CACHE_VAR = "PYTOOLS_SHARE_AWS_CLI_CACHE"
+
+
+# Default boto3 sessions, one per thread, as boto3 sessions are not thread-safe:
+_default_boto3_sessions = threading.local()
+
+
+def _default_boto3_session() -> Boto3Session:
+    """
+    Returns the default boto3 session of the current thread, shared by all routes not given
+    one explicitly.
+
+    Creating a session resolves the credential chain (files, environment, instance metadata),
+    so do it only once per thread. Call `_reset_default_boto3_sessions()` to start over, e.g.
+    after changing `AWS_PROFILE`.
+    """
+    sessions = _default_boto3_sessions
+    boto3_session = getattr(sessions, "boto3_session", None)
+    if boto3_session is None:
+        boto3_session = sessions.boto3_session = _new_default_boto3_session()
+    return boto3_session
+
+
+def _reset_default_boto3_sessions() -> None:
+    """Forgets the default boto3 sessions of all threads."""
+    global _default_boto3_sessions  # pylint: disable=global-statement
+    _default_boto3_sessions = threading.local()
+
+
+def _new_default_boto3_session() -> Boto3Session:
+    """
+    Creates a default boto3 session.
+
+    If the `PYTOOLS_SHARE_AWS_CLI_CACHE` environment variable is set to a true value,
+    credentials obtained by assuming a role are cached in the AWS CLI's credential cache, so
+    that they are shared with other processes (and the CLI) instead of each process calling
+    STS (and possibly prompting for MFA) again.
+    """
+    if os.environ.get(_SHARE_AWS_CLI_CACHE_VAR, "").lower() not in _TRUTHY:
+        return Boto3SessionGenerator().generate_default_session()
+
+    botocore_session = BotocoreSession()
+    boto3_session = Boto3SessionGenerator().generate_default_session(botocore_session)
+    # <https://github.com/boto/botocore/blob/develop/botocore/credentials.py>
+    credential_resolver = botocore_session.get_component("credential_provider")
+    for provider_name in ("assume-role", "assume-role-with-web-identity"):
+        try:
+            provider = credential_resolver.get_provider(provider_name)
+        except UnknownCredentialError:
+            continue
+        provider.cache = JSONFileCache(_AWS_CLI_CACHE_DIR)
+    return boto3_session
+
+
+# The only possible `Route.connect_args`, by whether to use SSL and whether to verify the peer.
+# Read-only, as they are shared by all routes:
+_CA_CERT_FILE_STR = str(CA_CERT_FILENAME)
+_CONNECT_ARGS: Dict[Tuple[bool, bool], Mapping[str, Any]] = {
+    (False, False): MappingProxyType({}),
+    (False, True): MappingProxyType({}),
+    (True, False): MappingProxyType({"sslrootcert": _CA_CERT_FILE_STR, "sslmode": "require"}),
+    (True, True): MappingProxyType({"sslrootcert": _CA_CERT_FILE_STR, "sslmode": "verify-full"}),
+}
+
+
+# Match the token lifetime in seconds in an RDS IAM auth token (a presigned URL):
+_IAM_TOKEN_EXPIRES_PATTERN = re.compile(r"[?&]X-Amz-Expires=(\d+)")
+
+
+def _connection_url(
+    dialect: str,
+    user: str,
+    password: Optional[str],
+    host: str,
+    port: int,
+    database: Optional[str],
+    iam_auth: bool,
+) -> str:
+    if password:
+        authority = f"{user}:{urllib.parse.quote_plus(password)}"
+    else:
+        authority = user
+    query = "?iam_auth=true" if iam_auth else ""
+    return f"{dialect}://{authority}@{host}:{port}/{database or ''}{query}"
+
+
+# Database passwords fetched from SSM, by `(region, parameter name)`, with the time they were
+# fetched at. SSM throttles `GetParameter` at a low rate, and passwords rarely change.
+_PASSWORD_CACHE_TTL = 15 * 60
+_password_cache: Dict[Tuple[str, str], Tuple[float, str]] = {}
+
+
+def _cached_password(cache_key: Tuple[str, str]) -> Optional[str]:
+    cached = _password_cache.get(cache_key)
+    if cached is not None and time.monotonic() - cached[0] < _PASSWORD_CACHE_TTL:
+        return cached[1]
+    return None
+
+
+def _cache_passwords(ssm_connect: SsmConnect, pass_parameters: Sequence[str]) -> None:
+    """Fetches the given passwords that are not cached yet, with as few SSM calls as possible."""
+    missing = [
+        pass_parameter
+        for pass_parameter in pass_parameters
+        if _cached_password((ssm_connect.aws_region, pass_parameter)) is None
+    ]
+    if missing:
+        passwords = ssm_connect.get_parameter_values(missing, True)
+        now = time.monotonic()
+        for pass_parameter, password in passwords.items():
+            _password_cache[(ssm_connect.aws_region, pass_parameter)] = (now, password)
+
+
+def _get_cached_password(ssm_connect: SsmConnect, pass_parameter: str) -> str:
+    cache_key = (ssm_connect.aws_region, pass_parameter)
+    password = _cached_password(cache_key)
+    if password is None:
+        password = ssm_connect.get_parameter_value(pass_parameter, True)
+        _password_cache[cache_key] = (time.monotonic(), password)
+    return password
+
+
 class Route:
     LOCAL_HOST_DEFAULT = "127.0.0.1"
 
+    # Opens the SSH tunnels of `physical_route`. Set this to
+    # `pytools.sql.ssh_forwarder.SSHForwarder` to forward ports in-process instead of running
+    # `/usr/bin/ssh` for every tunnel (requires the `sshtunnel` extra).
+    ssh_tunnel_class: Callable[..., Union[SSHTunnel, SSHForwarder]] = SSHTunnel
+
+    # Set this to a number of seconds to have the SSH tunnels of `physical_route` to the same
+    # bastion host share a single SSH connection, kept open for that long after the last tunnel
+    # using it has closed. See `SSHTunnel`'s `control_persist`.
+    ssh_control_persist: Optional[int] = None
+
+    # Routes are created in numbers (e.g. by `physical_route` and `replace`), so avoid the
+    # overhead of a per-instance `__dict__`:
+    __slots__ = (
+        "host",
+        "port",
+        "user",
+        "_password",
+        "database",
+        "iam_auth",
+        "expires_at",
+        "ssl",
+        "bastion_host",
+        "_boto3_session",
+        "_connection_url_cache",
+    )
+
+    # Consider IAM tokens expired this many seconds early, so that connections are not
+    # attempted with a token that expires in flight:
+    IAM_TOKEN_EXPIRY_MARGIN = 60
+
+    # Constant for PostgreSQL:
+    driver_module: ModuleType = psycopg2
+    sql_alchemy_dialect = "postgresql"
+
     @classmethod
     def from_config(
         cls,
@@ -43,7 +226,9 @@ class Route:
         Arguments:
             configs -- `tools.configs.Configs` object that provides AWS region, database endpoints,
                 database user names, and the database name.
-            boto3_session -- (optional) `boto3.session.Session` object.
+            boto3_session -- (optional) `boto3.session.Session` object. boto3 sessions are not
+                thread-safe, so do not pass the same session to routes used in different threads
+                (default: a session per thread).
             ssm_connect -- (optional) `pytools.ssm_connect.SsmConnect` object that provides database
                 passwords and CA SSL certificates.
             use_writer -- (optional) Boolean indicating whether write access is required.
@@ -54,9 +239,6 @@ class Route:
         Returns:
             `Route` object describing where to connect and how to authenticate.
         """
-        boto3_session = boto3_session or Boto3SessionGenerator().generate_default_session()
-        ssm_connect = ssm_connect or SsmConnect(boto3_session=boto3_session)
-
         host = configs.pg_db_endpoint if use_writer or use_master else configs.pg_db_ro_endpoint
         port = configs.pg_db_port or 5432
 
@@ -83,7 +265,10 @@ class Route:
                 pass_parameter = configs.readwrite_pass_parameter
             else:
                 pass_parameter = configs.readonly_pass_parameter
-            password = ssm_connect.get_parameter_value(pass_parameter, True)
+            ssm_connect = ssm_connect or SsmConnect(
+                boto3_session=boto3_session or _default_boto3_session()
+            )
+            password = _get_cached_password(ssm_connect, pass_parameter)
 
         route = cls(
             host=host,
@@ -101,6 +286,66 @@ class Route:
             route.refresh_iam_token()
         return route
 
+    # `from_config` arguments for each role supported by `from_config_multi`:
+    ROLES: Dict[str, Dict[str, bool]] = {
+        "readonly": {},
+        "readwrite": {"use_writer": True},
+        "master": {"use_master": True},
+    }
+
+    @classmethod
+    def from_config_multi(
+        cls,
+        configs: Configs,
+        roles: Sequence[str] = ("readonly", "readwrite", "master"),
+        *,
+        bastion_host: Optional[str] = None,
+        boto3_session: Optional[Boto3Session] = None,
+        ssm_connect: Optional[SsmConnect] = None,
+    ) -> Dict[str, Route]:
+        """
+        Determine SQL connection info for multiple roles based on project configuration, like
+        `from_config`, but fetch all required passwords with a single SSM call.
+
+        Arguments:
+            configs -- `tools.configs.Configs` object, see `from_config`.
+            roles -- (optional) Roles to create routes for: `readonly`, `readwrite`, and/or
+                `master` (default: all).
+            bastion_host, boto3_session, ssm_connect -- (optional) See `from_config`.
+
+        Returns:
+            `Route` objects by role.
+        """
+        unknown_roles = set(roles) - cls.ROLES.keys()
+        if unknown_roles:
+            raise ValueError(f"Unknown roles: {', '.join(sorted(unknown_roles))}")
+
+        # Master user cannot use IAM auth; other users do if configured.
+        pass_parameters = []
+        if "master" in roles:
+            pass_parameters.append(configs.master_pass_parameter)
+        if not configs.db_iam_auth:
+            if "readwrite" in roles:
+                pass_parameters.append(configs.readwrite_pass_parameter)
+            if "readonly" in roles:
+                pass_parameters.append(configs.readonly_pass_parameter)
+        if pass_parameters:
+            ssm_connect = ssm_connect or SsmConnect(
+                boto3_session=boto3_session or _default_boto3_session()
+            )
+            _cache_passwords(ssm_connect, pass_parameters)
+
+        return {
+            role: cls.from_config(
+                configs,
+                bastion_host=bastion_host,
+                boto3_session=boto3_session,
+                ssm_connect=ssm_connect,
+                **cls.ROLES[role],
+            )
+            for role in roles
+        }
+
     @classmethod
     def from_env(cls) -> Route:
         try:
@@ -110,7 +355,7 @@ class Route:
                 user=os.environ["PGUSER"],
                 password=os.environ.get("PGPASSWORD"),  # May use `PGPASSFILE` instead.
                 database=os.environ["PGDATABASE"],
-                ssl=os.getenv("PGREQUIRESSL", "0").lower() in ("1", "true", "yes", "on"),
+                ssl=os.environ.get("PGREQUIRESSL", "0").lower() in _TRUTHY,
             )
         except KeyError as e:
             missing_var = e.args[0]
@@ -139,9 +384,16 @@ class Route:
         self.expires_at = expires_at
         self.ssl = ssl
 
-        self.bastion_host: Optional[str] = os.environ.get("BASTION_HOST")
+        self.bastion_host = (
+            bastion_host if bastion_host is not None else os.environ.get("BASTION_HOST")
+        )
+
+        # Only IAM auth needs AWS access. Without a session of its own, the route uses the
+        # default session of the thread it is used in:
+        self._boto3_session = boto3_session
 
-        self.boto3_session = boto3_session or Boto3SessionGenerator().generate_default_session()
+        # URL components and the URL last built from them:
+        self._connection_url_cache: Optional[Tuple[Tuple, str]] = None
 
     @contextmanager
     def physical_route(self) -> Iterator[Route]:
@@ -152,8 +404,9 @@ class Route:
         guaranteed outside this context.
 
         If `bastion_host` constructor argument or `BASTION_HOST` environment
-        variable are defined, sets up an SSH tunnel using `/usr/bin/ssh` and forwards
-        database connections through it.
+        variable are defined, sets up an SSH tunnel using `ssh_tunnel_class` (by default,
+        `/usr/bin/ssh`) and forwards database connections through it. Tunnels share SSH
+        connections if `ssh_control_persist` is set.
 
         For example:
 
@@ -161,11 +414,21 @@ class Route:
                 connect(host=physical_route.host, port=physical_route.port)
         """
         if self.bastion_host:
-            connection_id = str(self).encode()
+            # Identify the connection by its destination only; the URL would include the
+            # password, which changes with every IAM token refresh.
+            connection_id = f"{self.host}:{self.port}:{self.user}:{self.database or ''}".encode()
             local_host = self.LOCAL_HOST_DEFAULT  # SSH will default to this local address
-            local_port = 54000 + binascii.crc32(connection_id) % 1000
+            # Spread local ports widely, as routes to different destinations through the same
+            # bastion host must not collide:
+            local_port = 54000 + binascii.crc32(connection_id) % 10000
             port_forward = PortForward(local_port=local_port, host=self.host, port=self.port)
-            ssh_tunnel = SSHTunnel(bastion_host=self.bastion_host, port_forwards=[port_forward])
+            # Only pass `control_persist` if set, for custom tunnel classes without it:
+            tunnel_kwargs = {}
+            if self.ssh_control_persist is not None:
+                tunnel_kwargs["control_persist"] = self.ssh_control_persist
+            ssh_tunnel = self.ssh_tunnel_class(
+                bastion_host=self.bastion_host, port_forwards=[port_forward], **tunnel_kwargs
+            )
             ssh_tunnel.wait()
             # At this point, we have established an SSH tunnel to the bastion host, and have forwarded the local_port to its self.port ,
             # so when we connect to local_port, we are actually connecting to self.port on the bastion host.
@@ -175,11 +438,19 @@ class Route:
             yield self
 
     def replace(self, **kwargs: Any) -> Route:
-        attrs = self.__dict__.copy()
-        attrs["password"] = self._password
-        del attrs["_password"]
-        attrs.update(kwargs)
-        return self.__class__(**attrs)
+        """
+        Returns a copy of the route with the given constructor arguments replaced, e.g.
+        `route.replace(database=None)`.
+        """
+        route = copy.copy(self)
+        if "password" in kwargs:
+            kwargs["_password"] = kwargs.pop("password")
+        for name, value in kwargs.items():
+            try:
+                setattr(route, name, value)
+            except AttributeError:
+                raise TypeError(f"replace() got an unexpected keyword argument {name!r}") from None
+        return route
 
     def refresh_iam_token(self) -> None:
         """
@@ -192,13 +463,24 @@ class Route:
         token = RdsConnect(boto3_session=self.boto3_session).generate_db_auth_token(
             host=self.host, port=self.port, user=self.user
         )
-        query_string = urllib.parse.parse_qs(urllib.parse.urlparse(token).query)
-        expires_at = int(time.monotonic()) + int(query_string["X-Amz-Expires"][0])
+        match = _IAM_TOKEN_EXPIRES_PATTERN.search(token)
+        if match is None:
+            raise ValueError("IAM auth token does not specify X-Amz-Expires")
+        expires_at = int(time.monotonic()) + int(match[1]) - self.IAM_TOKEN_EXPIRY_MARGIN
         self._password, self.expires_at = token, expires_at
 
     def __str__(self) -> str:
         return self.sql_alchemy_connection_url
 
+    @property
+    def boto3_session(self) -> Boto3Session:
+        # Do not keep the default session: the route may be used from other threads.
+        return self._boto3_session or _default_boto3_session()
+
+    @boto3_session.setter
+    def boto3_session(self, boto3_session: Optional[Boto3Session]) -> None:
+        self._boto3_session = boto3_session
+
     @property
     def expired(self) -> bool:
         return self.expires_at is not None and time.monotonic() >= self.expires_at
@@ -210,41 +492,32 @@ class Route:
         return self._password
 
     @property
-    def driver_module(self) -> ModuleType:
-        return psycopg2
-
-    @property
-    def sql_alchemy_dialect(self) -> str:
-        return "postgresql"
-
-    @property
-    def sql_alchemy_connection_url(self, redact=False) -> str:
-        database = self.database or ""
-        if redact:
-            authority = "USER_REDACTED:PASSWORD_REDACTED"
-        else:
-            if self.password:
-                authority = f"{self.user}:{urllib.parse.quote_plus(self.password)}"
-            else:
-                authority = self.user
-        url = f"{self.sql_alchemy_dialect}://{authority}@{self.host}:{self.port}/{database}"
-        params = {}
-        if self.iam_auth:
-            params["iam_auth"] = "true"
-        if params:
-            params_str = "&".join(f"{key}={value}" for key, value in params.items())
-            url = f"{url}?{params_str}"
+    def sql_alchemy_connection_url(self) -> str:
+        # Routes are converted to URLs for every log message, and IAM tokens are long to encode,
+        # so cache the URL. Cache it on the route, so that the password is not kept alive
+        # beyond the route.
+        components = (
+            self.sql_alchemy_dialect,
+            self.user,
+            self.password,
+            self.host,
+            self.port,
+            self.database,
+            self.iam_auth,
+        )
+        cached = self._connection_url_cache
+        if cached is not None and cached[0] == components:
+            return cached[1]
+        url = _connection_url(*components)
+        self._connection_url_cache = (components, url)
         return url
 
     @property
-    def connect_args(self) -> dict:
-        args: Dict[str, Any] = {}
-        if self.ssl:
-            ssl_verify_peer = not (
-                # Do not verify SSL certificate if SSH tunnel or local connection.
-                self.bastion_host
-                or self.host == self.LOCAL_HOST_DEFAULT
-            )
-            args["sslrootcert"] = str(CA_CERT_FILENAME)
-            args["sslmode"] = "verify-full" if ssl_verify_peer else "require"
-        return args
+    def connect_args(self) -> Mapping[str, Any]:
+        """Additional driver connection arguments (read-only)."""
+        ssl_verify_peer = not (
+            # Do not verify SSL certificate if SSH tunnel or local connection.
+            self.bastion_host
+            or self.host == self.LOCAL_HOST_DEFAULT
+        )
+        return _CONNECT_ARGS[bool(self.ssl), ssl_verify_peer]
@@ -4,17 +4,25 @@ It relies on the low-level methods in `pytools.sql.adapters.postgresql`.
 Does not include any logic specific to data or database structure.
 """
 
+import functools
 import re
-from contextlib import contextmanager
+import uuid
+from contextlib import contextmanager, nullcontext
 from pathlib import Path
 from typing import (
+    IO,
     TYPE_CHECKING,
     Any,
+    Iterable,
     Iterator,
+    List,
+    Mapping,
     Optional,
     Sequence,
+    Tuple,
     Type,
     TypeVar,
+    Union,
 )
 
 import jinja2
@@ -48,6 +56,224 @@ __all__ = [
 ]
 
 
+# Match a Jinja2 expression consisting of just a variable name:
+_SIMPLE_PLACEHOLDER_PATTERN = re.compile(r"\{\{\s*([^\W\d]\w*)\s*\}\}")
+
+# Names that Jinja2 treats specially in expressions: literals, operators, `self`, and globals.
+_JINJA2_RESERVED_NAMES = frozenset(
+    "true false none True False None and or not in is if else self "
+    "range dict lipsum cycler joiner namespace".split()
+)
+
+
+class _SimpleTemplate:
+    """
+    Template that only substitutes variables, like a Jinja2 template consisting of nothing but
+    text and `{{ name }}` expressions would, but considerably faster.
+    """
+
+    __slots__ = ("_parts",)
+
+    def __init__(self, parts: List[str]) -> None:
+        # Alternating text and variable names, starting and ending with text:
+        self._parts = parts
+
+    def render(self, fragments: Mapping[str, Any]) -> str:
+        rendered = self._parts.copy()
+        for index in range(1, len(rendered), 2):
+            name = rendered[index]
+            # Like Jinja2, render undefined variables as empty strings.
+            rendered[index] = str(fragments[name]) if name in fragments else ""
+        return "".join(rendered)
+
+
+@functools.lru_cache(maxsize=1)
+def _jinja_environment() -> jinja2.Environment:
+    # Persist compiled templates across processes, so that short-lived workers (e.g. Lambda
+    # invocations or forked web workers) do not compile every query template anew. Jinja2
+    # picks a private per-user cache directory.
+    bytecode_cache: Optional[jinja2.BytecodeCache]
+    try:
+        bytecode_cache = jinja2.FileSystemBytecodeCache()
+    except (OSError, RuntimeError):
+        # No usable cache directory, e.g. on a read-only file system.
+        bytecode_cache = None
+    return jinja2.Environment(bytecode_cache=bytecode_cache)
+
+
+def _compile_jinja_template(template_string: str, filename: str) -> jinja2.Template:
+    environment = _jinja_environment()
+    bytecode_cache = environment.bytecode_cache
+    if bytecode_cache is None:
+        return environment.from_string(template_string)
+    # Like `jinja2.BaseLoader.load`, but for a template whose source has already been read.
+    # Cached code is keyed by file name and invalidated by a checksum of the source.
+    bucket = bytecode_cache.get_bucket(environment, filename, filename, template_string)
+    if bucket.code is None:
+        bucket.code = environment.compile(template_string, filename, filename)
+        bytecode_cache.set_bucket(bucket)
+    return environment.template_class.from_code(
+        environment, bucket.code, environment.make_globals(None)
+    )
+
+
+def _compile_template(
+    template_string: str, filename: str
+) -> Union[jinja2.Template, _SimpleTemplate]:
+    """
+    Compiles the given Jinja2 template, or, if it uses no Jinja2 features other than variable
+    substitution, returns an equivalent `_SimpleTemplate`.
+    """
+    if "{%" not in template_string and "{#" not in template_string:
+        parts = _SIMPLE_PLACEHOLDER_PATTERN.split(template_string)
+        if not any("{{" in text for text in parts[::2]) and _JINJA2_RESERVED_NAMES.isdisjoint(
+            parts[1::2]
+        ):
+            # Jinja2 normalizes line endings in the template text, and drops a single trailing
+            # newline.
+            for index in range(0, len(parts), 2):
+                parts[index] = parts[index].replace("\r\n", "\n").replace("\r", "\n")
+            parts[-1] = parts[-1].removesuffix("\n")
+            return _SimpleTemplate(parts)
+    return _compile_jinja_template(template_string, filename)
+
+
+@functools.lru_cache(maxsize=256)
+def _query_template(query_path: Path, mtime_ns: int) -> Union[jinja2.Template, _SimpleTemplate]:
+    # Compiling a template is much more expensive than rendering it, and the same query files
+    # are read over and over. The modification time is part of the key so that edited files are
+    # picked up.
+    return _compile_template(query_path.read_text(), str(query_path))
+
+
+@functools.lru_cache(maxsize=256)
+def _count_statement(table_name: str) -> str:
+    # The upsert helpers count the rows of the same few tables over and over.
+    return f"SELECT COUNT(*) FROM {table_name}"
+
+
+_RETURNING_PATTERN = re.compile(r"\bRETURNING\b", re.IGNORECASE)
+
+
+def _cte_statement(query_string: QueryT) -> Optional[str]:
+    """
+    Returns the given statement in a form that can be embedded in a `WITH` clause with an added
+    `RETURNING` clause, or `None` if that is not safe, e.g. because the statement already has a
+    `WITH` or `RETURNING` clause, or because it consists of several statements.
+    """
+    if isinstance(query_string, Query):
+        query_string = query_string.rendered
+    if not query_string:
+        return None
+    query_string = query_string.strip().rstrip(";").rstrip()
+    if (
+        ";" in query_string
+        or query_string[:4].upper() == "WITH"
+        or _RETURNING_PATTERN.search(query_string)
+    ):
+        return None
+    return query_string
+
+
+def _counting_insert(query_string: QueryT) -> Optional[str]:
+    """
+    Wraps an `INSERT` statement into a single statement returning the numbers of inserted and
+    updated (by `ON CONFLICT DO UPDATE`) rows. Rows written by the `INSERT` itself have no
+    `xmax`, while updated rows carry the ID of the updating transaction.
+
+    Returns `None` if the statement is not an `INSERT` or cannot be wrapped safely.
+    """
+    query_string = _cte_statement(query_string)
+    if query_string is None or query_string[:6].upper() != "INSERT":
+        return None
+    # Start every appended clause on a new line, so that a trailing `--` comment in the
+    # statement does not swallow it.
+    return (
+        f"WITH upserted AS (\n{query_string}\nRETURNING (xmax = 0) AS inserted\n)\n"
+        "SELECT COUNT(*) FILTER (WHERE inserted), COUNT(*) FILTER (WHERE NOT inserted) "
+        "FROM upserted"
+    )
+
+
+def _upsert_counts(affected_rows: int, inserted_rows: int, deleted_rows: int) -> Tuple[int, int]:
+    """
+    Returns the numbers of duplicate and updated rows of an upsert, given its numbers of
+    affected, inserted, and deleted rows. Updated rows count as 2 affected rows, inserted rows
+    count as 1.
+    """
+    duplicate_rows = affected_rows - inserted_rows - deleted_rows
+    return duplicate_rows, duplicate_rows // 2
+
+
+def _mentions_table(query_string: str, table_name: str) -> int:
+    """
+    Returns how often the given table is referred to by name in the given statement. Errs on the
+    side of overcounting, e.g. for column names or comments equal to the table name.
+    """
+    name = table_name.rsplit(".", 1)[-1].strip('"`')
+    pattern = rf'(?<![\w$])["`]?{re.escape(name)}["`]?(?![\w$])'
+    return len(re.findall(pattern, query_string, re.IGNORECASE))
+
+
+def _combine_delete_insert(
+    table_name: str,
+    delete_query_string: QueryT,
+    delete_query_params: Optional[QueryParams],
+    insert_query_string: QueryT,
+    insert_query_params: Optional[QueryParams],
+) -> Optional[Tuple[str, Optional[QueryParams]]]:
+    """
+    Combines a `DELETE` and an `INSERT` statement into a single statement returning the numbers
+    of deleted and inserted rows, so that both can be executed in one round-trip.
+
+    Returns `None` if the statements cannot be combined safely, e.g. because they already have
+    a `WITH` or `RETURNING` clause, because their parameter styles differ, or because the
+    `INSERT` reads from the table: both parts of the combined statement see the same snapshot,
+    so the `INSERT` would still see the rows being deleted.
+    """
+    query_strings = []
+    for query_string in (delete_query_string, insert_query_string):
+        query_string = _cte_statement(query_string)
+        if query_string is None:
+            return None
+        query_strings.append(query_string)
+    # The table is mentioned once, as the target of the `INSERT`:
+    if _mentions_table(query_strings[1], table_name) > 1:
+        return None
+
+    # A `%` is only an escape character in statements with parameters:
+    if delete_query_params is None and insert_query_params is None:
+        query_params = None
+    elif delete_query_params is None or insert_query_params is None:
+        if "%" in query_strings[0 if delete_query_params is None else 1]:
+            return None
+        query_params = (
+            delete_query_params if insert_query_params is None else insert_query_params
+        )
+    elif isinstance(delete_query_params, Mapping) and isinstance(insert_query_params, Mapping):
+        if any(
+            key in insert_query_params and insert_query_params[key] != value
+            for key, value in delete_query_params.items()
+        ):
+            return None
+        query_params = {**delete_query_params, **insert_query_params}
+    elif not isinstance(delete_query_params, Mapping) and not isinstance(
+        insert_query_params, Mapping
+    ):
+        query_params = (*delete_query_params, *insert_query_params)
+    else:
+        return None
+
+    # The order in which the two parts are executed is unspecified. Start every appended clause
+    # on a new line, so that a trailing `--` comment in a statement does not swallow it.
+    combined_query_string = (
+        f"WITH deleted AS (\n{query_strings[0]}\nRETURNING 1\n), "
+        f"inserted AS (\n{query_strings[1]}\nRETURNING 1\n)\n"
+        "SELECT (SELECT COUNT(*) FROM deleted), (SELECT COUNT(*) FROM inserted)"
+    )
+    return combined_query_string, query_params
+
+
 # SQLConnect class
 ###############################################################################
 
@@ -72,7 +298,7 @@ class SQLConnect:
 
     RETRY BEHAVIOR: Certain database errors are automatically retried (generally only those
     that are worth retrying, such as connection errors or certain resource errors)
-    with exponential back-off, using `pytools.common.retry_backoff.RetryAndBackoff`.
+    with jittered exponential back-off, using `pytools.common.retry_backoff.RetryAndBackoff`.
     """
 
     def __init__(
@@ -81,6 +307,9 @@ class SQLConnect:
         *,
         autocommit: bool = False,
         cursor_class: Optional[Type[Cursor]] = None,
+        pooled: bool = False,
+        prepare_statements: bool = False,
+        adapter_class: Type[PostgreSQLAdapter] = PostgreSQLAdapter,
     ) -> None:
         """
         Create a `SQLConnect` object based on the route given.
@@ -92,16 +321,33 @@ class SQLConnect:
                 cursor classes supported out of the box are `psycopg2.extensions.cursor`,
                 `psycopg2.extras.DictCursor`, `psycopg2.extras.RealDictCursor`,
                 `psycopg2.extras.NamedTupleCursor`.
+            pooled -- Whether to reuse idle connections to the same route instead of
+                establishing a new connection on every `open`, and to keep the connection open
+                for reuse on `close` (default: False). See
+                `pytools.sql.adapters.pool.ConnectionPool`.
+            prepare_statements -- Whether to execute statements as server-side prepared
+                statements, so that repeated statements are parsed and planned only once per
+                connection (default: False). See `PostgreSQLAdapter.__init__`.
+            adapter_class -- Database adapter class to use (default: `PostgreSQLAdapter`, which
+                uses `psycopg2`). Specify
+                `pytools.sql.adapters.postgresql_v3.PostgreSQLAdapterV3` to use the `psycopg`
+                (v3) driver, which converts large query results faster and supports pipeline
+                mode. Cursor classes must then be `psycopg` cursor classes.
         """
-        self.adapter = PostgreSQLAdapter(
+        self.adapter = adapter_class(
             route=route,
             autocommit=autocommit,
             cursor_class=cursor_class or TupleCursor,
             execute_contextmanager=self._execute_contextmanager,
+            pooled=pooled,
+            prepare_statements=prepare_statements,
         )
 
         self._logger = Logger(__name__)
-        self._transaction_level: int = 0
+
+        # Applications tend to execute the same few statements over and over, so cache their
+        # rewritten versions:
+        self._quote_identifiers = functools.lru_cache(maxsize=1024)(self._quote_identifiers_impl)
 
     @classmethod
     def from_config(
@@ -115,6 +361,9 @@ class SQLConnect:
         use_master: bool = False,
         autocommit: bool = False,
         cursor_class: Optional[Type[Cursor]] = None,
+        pooled: bool = False,
+        prepare_statements: bool = False,
+        adapter_class: Type[PostgreSQLAdapter] = PostgreSQLAdapter,
     ) -> "SQLConnect":
         """
         Create a `SQLConnect` object and route to the appropriate endpoint based on the arguments
@@ -132,16 +381,29 @@ class SQLConnect:
             use_master -- (optional) Boolean indicating whether master-user access is required.
                 If `use_master` is specified, `use_writer` is ignored. (default: False)
             autocommit -- (optional) Boolean indicating whether to use autocommit mode.
+            pooled -- (optional) Boolean indicating whether to reuse idle connections to the same
+                route. (default: False)
+            prepare_statements -- (optional) Boolean indicating whether to execute statements as
+                server-side prepared statements. (default: False)
+            adapter_class -- (optional) Database adapter class to use.
+                (default: `PostgreSQLAdapter`)
         """
         route = Route.from_config(
-            config=configs,
+            configs=configs,
             bastion_host=bastion_host,
             boto3_session=boto3_session,
             ssm_connect=ssm_connect,
             use_writer=use_writer,
             use_master=use_master,
         )
-        return cls(route=route, autocommit=autocommit, cursor_class=cursor_class)
+        return cls(
+            route=route,
+            autocommit=autocommit,
+            cursor_class=cursor_class,
+            pooled=pooled,
+            prepare_statements=prepare_statements,
+            adapter_class=adapter_class,
+        )
 
     # Properties
     # =========================================================================
@@ -162,8 +424,11 @@ class SQLConnect:
     @staticmethod
     def get_query_string(query_file: Path) -> str:
         """Reads a formatted SQL statement from `query_file` and returns an unwrapped string."""
-        assert query_file.exists(), f"Query file path not valid: {query_file.as_posix()}"
-        return query_file.read_text()
+        # Let `read_text` check for existence instead of `stat`ing the file separately.
+        try:
+            return query_file.read_text()
+        except FileNotFoundError:
+            raise AssertionError(f"Query file path not valid: {query_file.as_posix()}") from None
 
     def read_query(
         self, query_path: Path, query_fragments: Optional[dict[str, Any]] = None
@@ -172,13 +437,17 @@ class SQLConnect:
         Reads a Jinja2-format template file with the given path and renders the template to a
         generic `Query` object using the given query fragments.
 
+        Compiled templates are cached in memory and, across processes, on disk. To avoid
+        compiling templates on first use, e.g. in freshly started workers, read all query
+        templates once at deployment time.
+
         Arguments:
             query_path: Path -- Path of query template.
             query_fragments: dict -- Mapping of template placeholder names to values.
         """
-        query_fragments = query_fragments.copy() if query_fragments else {}
-        template = jinja2.Template(query_path.read_text())
-        query_string = template.render(query_fragments).strip()
+        template = _query_template(query_path, query_path.stat().st_mtime_ns)
+        # `render` does not modify the mapping it is given, so there is no need to copy it.
+        query_string = template.render(query_fragments or {}).strip()
         return Query(query_string) if query_string else None
 
     @documented_by(DatabaseAdapter.vars)  # type: ignore
@@ -222,6 +491,14 @@ class SQLConnect:
     def connect(self) -> Connection:
         return self.adapter.connect()
 
+    @staticmethod
+    def close_pooled_connections() -> None:
+        """
+        Closes all idle connections kept open by `SQLConnect` objects created with
+        `pooled=True`, e.g. before a worker process exits.
+        """
+        PostgreSQLAdapter.connection_pool.clear()
+
     @documented_by(DatabaseAdapter.is_open)  # type: ignore
     @property
     def is_open(self) -> bool:
@@ -251,6 +528,32 @@ class SQLConnect:
     # quotes or backticks):
     _SQL_QUOTED_IDENTIFIER_PATTERN = re.compile(r"([\"`])(\w+)\1")
 
+    def _quote_identifiers_impl(self, query_string: str) -> str:
+        """Replaces quoted identifiers with ones quoted for the database."""
+        if '"' not in query_string and "`" not in query_string:
+            # Most statements have no quoted identifiers, and substring search is much cheaper
+            # than a regular expression scan.
+            return query_string
+        parts = []
+        quoted_identifiers: dict[str, str] = {}
+        position = 0
+        for match in self._SQL_QUOTED_IDENTIFIER_PATTERN.finditer(query_string):
+            identifier = match[2]
+            quoted_identifier = quoted_identifiers.get(identifier)
+            if quoted_identifier is None:
+                # Identifiers tend to be repeated within a query, so quote each one only once.
+                quoted_identifier = quoted_identifiers[identifier] = self.adapter.quote_ident(
+                    identifier
+                )
+            start, end = match.span()
+            parts.append(query_string[position:start])
+            parts.append(quoted_identifier)
+            position = end
+        if not parts:
+            return query_string
+        parts.append(query_string[position:])
+        return "".join(parts)
+
     @contextmanager
     def _execute_contextmanager(
         self,
@@ -260,7 +563,8 @@ class SQLConnect:
     ) -> Iterator:
         """
         Wraps the execution of an SQL statement in SQLConnect-specific behavior:
-        - Log the rendered version of the statement using the configured logger.
+        - Log the rendered version of the statement using the configured logger, if debug
+          logging is enabled.
 
         Arguments:
             cursor -- `Cursor` object on which the provided SQL statement is being executed.
@@ -268,15 +572,14 @@ class SQLConnect:
                 placeholders in conjunction with query parameters.
             query_params -- dictionary or tuple with query parameters.
         """
-        query_string = self._SQL_QUOTED_IDENTIFIER_PATTERN.sub(
-            lambda match: self.adapter.quote_ident(match[2]),
-            query_string,
-        )
+        query_string = self._quote_identifiers(query_string)
 
-        rendered_query_string = cursor.mogrify(query_string, query_params)
-        if isinstance(rendered_query_string, bytes):
-            rendered_query_string = rendered_query_string.decode()
-        self._logger.debug(f"Executing query: {rendered_query_string}")
+        # Rendering serializes all query parameters, so do it only if it will be logged.
+        if self._logger.isEnabledFor(Logger.DEBUG):
+            rendered_query_string = cursor.mogrify(query_string, query_params)
+            if isinstance(rendered_query_string, bytes):
+                rendered_query_string = rendered_query_string.decode()
+            self._logger.debug(f"Executing query: {rendered_query_string}")
 
         yield query_string, query_params
 
@@ -369,6 +672,17 @@ class SQLConnect:
             fetch_batch_size=fetch_batch_size,
         )
 
+    @documented_by(PostgreSQLAdapter.select_copy)
+    def select_copy(
+        self,
+        query_string: QueryT,
+        query_params: Optional[QueryParams] = None,
+        *,
+        file: IO,
+        copy_format: str = "binary",
+    ) -> None:
+        self.adapter.select_copy(query_string, query_params, file=file, copy_format=copy_format)
+
     def get_dict_query_results(
         self,
         query_string: QueryT,
@@ -378,13 +692,36 @@ class SQLConnect:
         Returns the query results as a list, with each entry encoded as a dictionary.
         The keys are the lower-case column names from the query results.
         """
-        results = self.adapter.select(
-            query_string,
-            query_params,
-            cursor_class=DictCursor,
-        )
-        results = [{k: v for k, v in row.items()} for row in results]
-        return results
+        return list(self.yield_dict_query_results(query_string, query_params))
+
+    def yield_dict_query_results(
+        self,
+        query_string: QueryT,
+        query_params: Optional[QueryParams] = None,
+        *,
+        fetch_batch_size: int = 1000,
+    ) -> Iterator[dict[str, Any]]:
+        """
+        Like `get_dict_query_results`, but yields the rows one at a time, converting only
+        `fetch_batch_size` rows to dictionaries at a time.
+
+        The cursor is a client-side cursor, so the driver still receives and buffers the entire
+        result when the query is executed. To stream large results in batches, use
+        `yield_fetchmany_query`.
+        """
+        # Fetch plain tuples and zip them with the column names, which is much cheaper than
+        # having a dict cursor build a row object per row only to copy it.
+        cursor = self.adapter.cursor(TupleCursor)
+        try:
+            self.adapter.execute(cursor, query_string, query_params)
+            if cursor.description is None:
+                return
+            column_names = tuple(column[0] for column in cursor.description)
+            for rows in iter(lambda: cursor.fetchmany(fetch_batch_size), []):
+                for row in rows:
+                    yield dict(zip(column_names, row))
+        finally:
+            cursor.close()
 
     @documented_by(DatabaseAdapter.exists)
     def exists(
@@ -394,6 +731,10 @@ class SQLConnect:
     ) -> bool:
         return self.adapter.exists(query_string, query_params)
 
+    @documented_by(DatabaseAdapter.estimated_row_count)
+    def estimated_row_count(self, table_name: str) -> int:
+        return self.adapter.estimated_row_count(table_name)
+
     def get_row_count(self) -> Optional[int]:
         """Returns count of rows found (disregarding LIMIT) for the last-executed query."""
         return self.adapter.found_rows()
@@ -441,6 +782,7 @@ class SQLConnect:
         query_string: QueryT,
         query_params: Optional[QueryParams] = None,
         *,
+        params_list: Optional[Iterable[Sequence[Any]]] = None,
         full_stats: bool = False,
         isolation_level: Optional[IsolationLevel] = None,
     ) -> dict[str, Any]:
@@ -463,8 +805,17 @@ class SQLConnect:
                 before and after the operation.
             query_string: Query | str -- The SQL query to execute.
             query_params: dict (optional) -- Mapping of query parameters to values.
-            full_stats: bool (optional) -- Whether to calculate "before" and "after" row
-                counts from the provided table (default: False). This is expensive.
+            params_list: Iterable[Sequence] (optional) -- Rows of values to insert. If
+                specified, `query_string` must contain a single `VALUES %s` placeholder,
+                which is expanded to batches of rows, and `query_params` must not be
+                specified. This is much faster than building a statement with one row
+                literal per row. See `PostgreSQLAdapter.execute_values`.
+            full_stats: bool (optional) -- Whether to calculate the numbers of inserted,
+                updated, and deleted rows (default: False). A single `INSERT` statement is
+                wrapped so that it counts the rows it inserts and updates itself. Otherwise,
+                "before" and "after" row counts are taken from the provided table, which is
+                expensive, as it counts the rows of the table twice. For a cheap approximate
+                row count, see `estimated_row_count`.
             isolation_level: IsolationLevel (optional) -- Execute the transaction with
                 the given isolation level. See the `IsolationLevel` enum class for the
                 supported isolation levels.
@@ -473,44 +824,68 @@ class SQLConnect:
             Dict representing an "UPSERT report" with information about the effects of
             the operation.
         """
+        if params_list is not None and query_params is not None:
+            raise ValueError("Specify either `query_params` or `params_list`, not both")
+
         inserted_rows, updated_rows, duplicate_rows, deleted_rows = 0, 0, 0, 0
         affected_rows = 0
-        cnt_query = f"SELECT COUNT(*) FROM {table_name}"
-
         with self.adapter.transaction(isolation_level=isolation_level):
             cursor = self.adapter.cursor()
             try:
+                counting_query_string = (
+                    _counting_insert(query_string)
+                    if full_stats and params_list is None
+                    else None
+                )
                 before_cnt = 0
-                if full_stats:
+                if full_stats and counting_query_string is None:
                     # get current num rows before running the query
-                    before_cnt = self.adapter.select_value(cnt_query)
+                    before_cnt = self.adapter.select_value(_count_statement(table_name))
 
                 # run the main query
-                self.adapter.execute(cursor, query_string, query_params)
-                affected_rows = cursor.rowcount  # updated rows count as 2, inserted rows count as 1
-
-                if full_stats:
+                if counting_query_string is not None:
+                    # the statement counts its own inserted and updated rows
+                    inserted_rows, conflicting_rows = self.adapter.select_row(
+                        counting_query_string,
+                        query_params,
+                        cursor_class=self.adapter.TupleCursor,
+                    )
+                    # same as the statement's own row count
+                    affected_rows = inserted_rows + conflicting_rows
+                    duplicate_rows, updated_rows = _upsert_counts(
+                        affected_rows, inserted_rows, deleted_rows
+                    )
+                elif params_list is not None:
+                    if isinstance(query_string, Query):
+                        query_string = query_string.rendered
+                    affected_rows = self.adapter.execute_values(
+                        cursor, self._quote_identifiers(query_string), params_list
+                    )
+                else:
+                    self.adapter.execute(cursor, query_string, query_params)
+                    # updated rows count as 2, inserted rows count as 1
+                    affected_rows = cursor.rowcount
+
+                if full_stats and counting_query_string is None:
                     # again, get current num rows after running the query
-                    after_cnt = self.adapter.select_value(cnt_query)
-                    if after_cnt >= before_cnt:
-                        inserted_rows = after_cnt - before_cnt
-                        updated_rows = (affected_rows - inserted_rows) // 2
-                        duplicate_rows = affected_rows - inserted_rows
-                    else:
-                        deleted_rows = before_cnt - after_cnt
-                        updated_rows = (affected_rows - deleted_rows) // 2
-                        duplicate_rows = affected_rows - deleted_rows
+                    after_cnt = self.adapter.select_value(_count_statement(table_name))
+                    # at most one of these is non-zero
+                    inserted_rows = max(after_cnt - before_cnt, 0)
+                    deleted_rows = max(before_cnt - after_cnt, 0)
+                    duplicate_rows, updated_rows = _upsert_counts(
+                        affected_rows, inserted_rows, deleted_rows
+                    )
             finally:
                 cursor.close()
 
         upsert_report = {
             "table_name": table_name,
             "success": 1,
-            "affected_rows": int(affected_rows),
-            "inserted_rows": int(inserted_rows),
-            "deleted_rows": int(deleted_rows),
-            "duplicate_rows": int(duplicate_rows),
-            "updated_rows": int(updated_rows),
+            "affected_rows": affected_rows,
+            "inserted_rows": inserted_rows,
+            "deleted_rows": deleted_rows,
+            "duplicate_rows": duplicate_rows,
+            "updated_rows": updated_rows,
         }
 
         self.logger.json(upsert_report, level=Logger.INFO)
@@ -526,6 +901,7 @@ class SQLConnect:
         *,
         full_stats: bool = False,
         isolation_level: Optional[IsolationLevel] = None,
+        combine_statements: bool = False,
     ) -> dict[str, Any]:
         """
         Executes and commits a pair of insert and delete queries as one ACID operation
@@ -553,10 +929,17 @@ class SQLConnect:
             delete_query_string: Query | str -- SQL query deleting data from the table.
             delete_query_params: dict -- Mapping of delete query parameters to values.
             full_stats: bool (optional) -- Whether to calculate "before" and "after" row
-                counts from the provided table (default: False). This is expensive.
+                counts from the provided table (default: False). This is expensive, as it
+                counts the rows of the table twice. For a cheap approximate row count, see
+                `estimated_row_count`.
             isolation_level: IsolationLevel (optional) -- Execute the transaction with
                 the given isolation level. See the `IsolationLevel` enum class for the
                 supported isolation levels.
+            combine_statements: bool (optional) -- Whether to send both queries to the server
+                as a single statement, where possible, saving a round-trip (default: False).
+                The two queries then see the same snapshot and may run in either order, so
+                only use this if the inserted rows never conflict with the deleted ones.
+                Queries whose `insert` reads from the table are never combined.
 
         Returns:
             dict representing an "UPSERT report" with information about the effects of
@@ -564,40 +947,61 @@ class SQLConnect:
         """
         inserted_rows, updated_rows, deleted_rows = 0, 0, 0
         insert_affected_rows, delete_affected_rows = 0, 0
-        cnt_query = f"SELECT COUNT(*) FROM {table_name}"
-
         with self.adapter.transaction(isolation_level=isolation_level):
             cursor = self.adapter.cursor()
             try:
                 # get current num rows before running the query
                 before_cnt = 0
                 if full_stats:
-                    before_cnt = self.adapter.select_value(cnt_query)
-
-                # execute the delete query
-                self.adapter.execute(cursor, delete_query_string, delete_query_params)
-                # updated rows count as 2, inserted rows count as 1
-                delete_affected_rows = cursor.rowcount
-
-                # execute the insert query
-                self.adapter.execute(cursor, insert_query_string, insert_query_params)
-                # updated rows count as 2, inserted rows count as 1
-                insert_affected_rows = cursor.rowcount
+                    before_cnt = self.adapter.select_value(_count_statement(table_name))
+
+                combined = (
+                    _combine_delete_insert(
+                        table_name,
+                        delete_query_string,
+                        delete_query_params,
+                        insert_query_string,
+                        insert_query_params,
+                    )
+                    if combine_statements
+                    else None
+                )
+                if combined is not None:
+                    # execute the delete and insert queries in one round-trip
+                    delete_affected_rows, insert_affected_rows = self.adapter.select_row(
+                        *combined, cursor_class=self.adapter.TupleCursor
+                    )
+                else:
+                    # Submit both queries at once where the driver supports it, so the row
+                    # counts are only available afterwards.
+                    insert_cursor = self.adapter.cursor()
+                    try:
+                        with self.adapter.pipeline():
+                            # execute the delete query
+                            self.adapter.execute(
+                                cursor, delete_query_string, delete_query_params
+                            )
+                            # execute the insert query
+                            self.adapter.execute(
+                                insert_cursor, insert_query_string, insert_query_params
+                            )
+                        # updated rows count as 2, inserted rows count as 1
+                        delete_affected_rows = cursor.rowcount
+                        insert_affected_rows = insert_cursor.rowcount
+                    finally:
+                        insert_cursor.close()
 
                 # again, get current num rows after running the query
                 if full_stats:
-                    after_cnt = self.adapter.select_value(cnt_query)
-                    if after_cnt > before_cnt:
-                        inserted_rows = after_cnt - before_cnt
-                        deleted_rows = 0
+                    after_cnt = self.adapter.select_value(_count_statement(table_name))
+                    # at most one of these is non-zero
+                    inserted_rows = max(after_cnt - before_cnt, 0)
+                    deleted_rows = max(before_cnt - after_cnt, 0)
+                    if inserted_rows:
                         updated_rows = insert_affected_rows - delete_affected_rows
-                    elif after_cnt < before_cnt:
-                        deleted_rows = before_cnt - after_cnt
-                        inserted_rows = 0
+                    elif deleted_rows:
                         updated_rows = delete_affected_rows - insert_affected_rows
                     else:
-                        inserted_rows = 0
-                        deleted_rows = 0
                         updated_rows = insert_affected_rows
             finally:
                 cursor.close()
@@ -605,11 +1009,11 @@ class SQLConnect:
         upsert_report = {
             "table_name": table_name,
             "success": 1,
-            "inserted_rows": int(inserted_rows),
-            "insert_affected_rows": int(insert_affected_rows),
-            "deleted_rows": int(deleted_rows),
-            "delete_affected_rows": int(delete_affected_rows),
-            "updated_rows": int(updated_rows),
+            "inserted_rows": inserted_rows,
+            "insert_affected_rows": insert_affected_rows,
+            "deleted_rows": deleted_rows,
+            "delete_affected_rows": delete_affected_rows,
+            "updated_rows": updated_rows,
         }
 
         self.logger.json(upsert_report, level=Logger.INFO)
@@ -618,13 +1022,27 @@ class SQLConnect:
     def yield_fetchmany_query(
         self, query_string: QueryT, query_params: Optional[QueryParams] = None, size: int = 100
     ) -> Iterator[list[dict[str, Any]]]:
-        """Executes a user-defined fetchmany query. Returns a generator for additional results."""
-        cursor = self.adapter.cursor(DictCursor)
-        try:
-            self.adapter.execute(cursor, query_string, query_params)
-            results = cursor.fetchmany(size=size)
-            while results:
-                yield results
-                results = cursor.fetchmany(size=size)
-        finally:
-            cursor.close()
+        """
+        Executes a user-defined fetchmany query. Returns a generator for additional results.
+
+        With the default `PostgreSQLAdapter`, the query is run in a server-side cursor, so that
+        only one batch of `size` rows is held in memory at a time. The cursor is declared in the
+        caller's transaction, which is neither committed nor rolled back here. Only in
+        autocommit mode, outside of a `transaction` context, does the cursor get a transaction
+        of its own, which is committed once the generator is exhausted or closed. The psycopg 3
+        adapter does not support server-side cursors, and fetches all rows at once.
+        """
+        # Without autocommit, psycopg2 declares the cursor in the current transaction, beginning
+        # one if needed, which remains the caller's to end.
+        own_transaction = self.adapter.autocommit and self.adapter.transaction_level == 0
+        with self.adapter.transaction() if own_transaction else nullcontext():
+            cursor = self.adapter.cursor(DictCursor, name=f"pytools_{uuid.uuid4().hex}")
+            try:
+                self.adapter.execute(cursor, query_string, query_params)
+                try:
+                    yield from iter(lambda: cursor.fetchmany(size=size), [])
+                except GeneratorExit:
+                    # The consumer stopped early. That is not an error, so do not roll back.
+                    return
+            finally:
+                cursor.close()
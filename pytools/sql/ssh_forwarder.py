@@ -0,0 +1,109 @@
+"""
+In-process SSH port forwarding using the `sshtunnel` (`paramiko`) package.
+
+A drop-in alternative to `pytools.sql.ssh_tunnel.SSHTunnel`, which runs `/usr/bin/ssh` for
+every tunnel, and by default establishes a new SSH connection for each (unless
+`Route.ssh_control_persist` is set). Here, the SSH connection is established once per bastion
+host and set of port forwards, and then shared by all routes forwarding the same ports, for the
+life of the process.
+
+`sshtunnel` is an optional dependency, so this module is not imported by `pytools.sql`; import
+it explicitly instead, and select it with `Route.ssh_tunnel_class`:
+
+>>> from pytools.sql.ssh_forwarder import SSHForwarder
+>>> Route.ssh_tunnel_class = SSHForwarder
+"""
+
+import atexit
+import os
+import threading
+from typing import Dict, Optional, Sequence, Tuple
+
+import sshtunnel
+
+from .ssh_tunnel import PortForward
+
+# Running forwarders, by bastion host, compression, and port forwards:
+_ForwarderKey = Tuple[str, bool, Tuple[PortForward, ...]]
+_forwarders: Dict[_ForwarderKey, sshtunnel.SSHTunnelForwarder] = {}
+_forwarders_lock = threading.Lock()
+
+
+def close_forwarders() -> None:
+    """Closes all SSH connections opened by `SSHForwarder`. Called on interpreter exit."""
+    with _forwarders_lock:
+        forwarders = list(_forwarders.values())
+        _forwarders.clear()
+    for forwarder in forwarders:
+        forwarder.stop()
+
+
+atexit.register(close_forwarders)
+
+
+class SSHForwarder:
+    def __init__(
+        self,
+        *,
+        bastion_host: Optional[str] = None,
+        port_forwards: Optional[Sequence[PortForward]] = None,
+        compress: bool = True,
+        connect_timeout: int = 5,
+        control_persist: Optional[int] = None,
+    ) -> None:
+        """
+        Forwards ports through a SSH connection to a bastion host, in-process.
+        Allows multiple port forwards to be specified.
+
+        The connection is reused by later forwarders with the same arguments, and is only
+        re-established if it has dropped. The bastion host may be a host alias from
+        `~/.ssh/config`, like with `/usr/bin/ssh`.
+
+        Arguments:
+            connect_timeout: int (optional) -- Give up establishing the SSH connection after
+                this many seconds (default: 5).
+            control_persist: int (optional) -- Accepted for compatibility with `SSHTunnel`,
+                and ignored: connections are always shared, for the life of the process.
+        """
+        self.compress = compress
+        self.port_forwards = list(port_forwards) if port_forwards else []
+        self.bastion_host = bastion_host or os.environ["BASTION_HOST"]
+        self.connect_timeout = connect_timeout
+
+        key = (self.bastion_host, self.compress, tuple(self.port_forwards))
+        with _forwarders_lock:
+            forwarder = _forwarders.get(key)
+            if forwarder is None or not forwarder.is_active:
+                if forwarder is not None:
+                    forwarder.stop()
+                forwarder = self._start_forwarder()
+                _forwarders[key] = forwarder
+        self.forwarder = forwarder
+
+    def _start_forwarder(self) -> sshtunnel.SSHTunnelForwarder:
+        forwarder = sshtunnel.SSHTunnelForwarder(
+            self.bastion_host,
+            ssh_config_file=os.path.expanduser(os.path.join("~", ".ssh", "config")),
+            remote_bind_addresses=[
+                (port_forward.host, port_forward.port) for port_forward in self.port_forwards
+            ],
+            local_bind_addresses=[
+                (port_forward.bind_address or "127.0.0.1", port_forward.local_port)
+                for port_forward in self.port_forwards
+            ],
+            compression=self.compress,
+        )
+        # Do not keep the interpreter alive for the shared connection:
+        forwarder.daemon_forward_servers = True
+        forwarder.daemon_transport = True
+        # `sshtunnel` only supports a global connect timeout:
+        sshtunnel.SSH_TIMEOUT = self.connect_timeout
+        forwarder.start()
+        return forwarder
+
+    def wait(self) -> int:
+        """
+        Returns 0 once the ports are forwarded, like `SSHTunnel.wait` does once `/usr/bin/ssh`
+        has gone to the background.
+        """
+        return 0
@@ -1,5 +1,7 @@
+import getpass
 import os
 import subprocess
+import tempfile
 from typing import NamedTuple, Optional, Sequence
 
 
@@ -15,6 +17,31 @@ class PortForward(NamedTuple):
         return f"{self.local_port}:{self.host}:{self.port}"
 
 
+def _control_path() -> str:
+    """
+    Returns the control socket path of the shared SSH connection to each bastion host, creating
+    its directory if needed. `%C` is a hash of the local host, remote host, port, and user,
+    which keeps the path short. It does not include the local user, though, so each local user
+    gets their own directory.
+    """
+    control_dir = os.path.join(tempfile.gettempdir(), f"pytools-ssh-{getpass.getuser()}")
+    os.makedirs(control_dir, mode=0o700, exist_ok=True)
+    if os.stat(control_dir).st_uid != os.getuid():
+        raise PermissionError(f"{control_dir} is owned by another user")
+    return os.path.join(control_dir, "%C")
+
+
+# Leading ssh arguments common to all tunnels:
+_SSH_ARGS = (
+    "/usr/bin/ssh",
+    "-f",  # go to background
+    "-q",  # quiet
+    "-o",
+    "ExitOnForwardFailure yes",
+)
+_SSH_ARGS_COMPRESSED = (*_SSH_ARGS, "-C")
+
+
 class SSHTunnel(subprocess.Popen):
     def __init__(
         self,
@@ -23,34 +50,57 @@ class SSHTunnel(subprocess.Popen):
         port_forwards: Optional[Sequence[PortForward]] = None,
         compress: bool = True,
         connect_timeout: int = 5,
+        control_persist: Optional[int] = None,
     ) -> None:
         """
         Opens a SSH tunnel to a bastion host and forwards ports.
         Allows multiple port forwards to be specified.
+
+        Optionally, tunnels to the same bastion host share a single SSH connection (OpenSSH
+        connection multiplexing), so only the first tunnel pays for connection setup and
+        authentication, and the bastion host's limits on concurrent connections are not hit.
+        The shared connection is a background ssh process that outlives this process by
+        `control_persist` seconds.
+
+        Arguments:
+            control_persist: int (optional) -- Share the SSH connection, and keep it open for
+                this many seconds after the last tunnel using it has closed (default: `None`,
+                do not share connections).
         """
         self.compress = compress
         self.port_forwards = list(port_forwards) if port_forwards else []
         self.bastion_host = bastion_host or os.environ["BASTION_HOST"]
         self.connect_timeout = connect_timeout
+        self.control_persist = control_persist
+
+        multiplex_args = []
+        if self.control_persist is not None:
+            multiplex_args = [
+                "-o",
+                "ControlMaster auto",
+                "-o",
+                f"ControlPath {_control_path()}",
+                "-o",
+                f"ControlPersist {self.control_persist}s",
+            ]
 
         port_forward_args = []
         for port_forward in self.port_forwards:
             port_forward_args.extend(["-L", str(port_forward)])
 
         args = [
-            "/usr/bin/ssh",
-            *(["-C"] if self.compress else []),
-            "-f",  # go to background
-            "-q",  # quiet
-            "-o",
-            "ExitOnForwardFailure yes",
+            *(_SSH_ARGS_COMPRESSED if self.compress else _SSH_ARGS),
+            *multiplex_args,
             *port_forward_args,
             self.bastion_host,
             "sleep",
             str(self.connect_timeout),
         ]
 
-        super().__init__(args)  # type: ignore
+        # Python file descriptors are not inherited anyway (PEP 446), and leaving `close_fds`
+        # off lets `subprocess` start ssh with `posix_spawn` (`vfork`) rather than `fork`,
+        # which does not copy the page tables of a large parent process.
+        super().__init__(args, close_fds=False)  # type: ignore
         # Ignore a bug in mypy thinking `args` will be passed to `object.__init__`,
         # which takes zero arguments. Evidently this code works at run-time.
         # <https://github.com/python/mypy/issues/4335>
@@ -1,17 +1,35 @@
+import socket
 import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
 from dataclasses import dataclass
-from typing import List, Optional
+from typing import Dict, List, Optional, Sequence, Tuple
 
 import psycopg2
-import pymysql
 
 from pytools.common.logger import Logger
+from pytools.common.retry_backoff import RetryAndBackoff
 
-from .adapters import DictCursor
+from .adapters import TupleCursor
 from .query import Query
 from .route import Route
 
 
+logger = Logger(__name__)
+
+# Delay in seconds before the first readiness check retry; doubled for every further retry:
+_READY_BACKOFF_BASE = 0.05
+
+
+def _tcp_port_open(host: str, port: int, timeout: float) -> bool:
+    """Returns whether a TCP connection to the given host and port can be established."""
+    try:
+        with socket.create_connection((host, port), timeout=timeout):
+            return True
+    except OSError:
+        return False
+
+
 class NotReadyError(Exception):
     pass
 
@@ -25,6 +43,41 @@ class DatabaseIndex:
     column_names: List[str]
 
 
+# Indexes by database `(host, port, database)`, table schema, and table name, as last looked up
+# with `use_cache=True`. Catalog queries are expensive, so callers that know the indexes have not
+# changed since may opt in to reusing them. Only callers that opt in fill the cache.
+_IndexCacheKey = Tuple[str, int, Optional[str], Optional[str], str]
+_index_cache: Dict[_IndexCacheKey, List[DatabaseIndex]] = {}
+
+
+# Suffixes of the names of primary key and system indexes in PostgreSQL:
+_SYSTEM_INDEX_SUFFIXES = ("_pkey", "_oid_index")
+
+# Indexes of the given tables, with their columns:
+_PG_INDEXES_QUERY = """
+    SELECT
+        tc.relname AS table_name,
+        ic.relname AS index_name,
+        i.indisunique AS unique,
+        array_agg(a.attname ORDER BY a.attname) AS column_names
+    FROM
+        pg_class AS tc
+        INNER JOIN pg_index AS i
+            ON tc.oid = i.indrelid
+        INNER JOIN pg_class AS ic
+            ON i.indexrelid = ic.oid
+        INNER JOIN pg_attribute AS a
+            ON (
+                tc.oid = a.attrelid and
+                a.attnum = ANY(i.indkey)
+            )
+    WHERE
+        tc.relname = ANY(%(table_names)s)
+    GROUP BY 1, 2, 3
+    ORDER BY 1, 2, 3
+"""
+
+
 class Util:
     def __new__(cls) -> "Util":
         raise NotImplementedError("{cls} acts as a namespace only")
@@ -33,103 +86,211 @@ class Util:
     def wait_postgresql_ready(route: Route, timeout: float = 30.0, interval: int = 1) -> None:
         """
         Check for PostgreSQL availability, and wait up to `timeout` seconds for it to become ready.
-        Retry no more frequently than every `interval` seconds.
+        Retry after exponentially growing, jittered delays of at most `interval` seconds, so that
+        a database that comes up quickly is detected quickly.
 
         Arguments:
             route -- `Route` object with connection/authentication information.
             timeout -- (optional) Wait for up to this many seconds for PostgreSQL to become ready.
                 (default: 30.0)
-            interval -- (optional) Retry no more frequently than this many seconds. (default: 1)
+            interval -- (optional) Wait at most this many seconds between retries. (default: 1)
         Raises:
             `NotReadyError` if PostgreSQL is not ready after `timeout` seconds.
         """
-        # pylint: disable=redefined-outer-name
-        logger = Logger(__name__)
         logger.debug(f"Waiting up to {timeout:.3} seconds for PostgreSQL to become ready ...")
 
         start_time = time.monotonic()
         connect_timeout = min(interval, 5)
 
+        attempt_number = 0
         while time.monotonic() < start_time + timeout:
-            try:
-                psycopg2.connect(
-                    host=route.host,
-                    port=route.port,
-                    user=route.user,
-                    password=route.password,
-                    dbname="postgres",
-                    connect_timeout=connect_timeout,
+            # Until the server listens, a bare TCP handshake is enough to tell, and is much
+            # cheaper for both sides than a full PostgreSQL connection attempt.
+            if _tcp_port_open(route.host, route.port, connect_timeout):
+                try:
+                    psycopg2.connect(
+                        host=route.host,
+                        port=route.port,
+                        user=route.user,
+                        password=route.password,
+                        dbname="postgres",
+                        connect_timeout=connect_timeout,
+                    ).close()
+                    return
+                except psycopg2.OperationalError:
+                    # Connection failed, e.g. because the server is still starting up.
+                    pass
+            # Don't handle any other psycopg2 exceptions.
+            time.sleep(
+                RetryAndBackoff.full_jitter_backoff(
+                    attempt_number, base=_READY_BACKOFF_BASE, cap=interval
                 )
-                return
-            except psycopg2.OperationalError:
-                # Connection failed.
-                pass
-            # Don't handle any other pymysql exceptions.
-            time.sleep(interval)
+            )
+            attempt_number += 1
 
         raise NotReadyError(f"PostgreSQL not ready after {timeout:.3} seconds")
 
+    @staticmethod
+    def wait_all_postgresql_ready(
+        routes: Sequence[Route], timeout: float = 30.0, interval: int = 1
+    ) -> None:
+        """
+        Like `wait_postgresql_ready`, but for several databases. The databases are waited for
+        concurrently, so this takes as long as the slowest database to become ready, rather
+        than the sum of all waits.
+
+        Arguments:
+            routes -- `Route` objects with connection/authentication information.
+            timeout -- (optional) Wait for up to this many seconds for all databases to become
+                ready. (default: 30.0)
+            interval -- (optional) Wait at most this many seconds between retries. (default: 1)
+        Raises:
+            `NotReadyError` if any database is not ready after `timeout` seconds.
+        """
+        if not routes:
+            return
+        with ThreadPoolExecutor(max_workers=len(routes)) as executor:
+            futures = [
+                executor.submit(Util.wait_postgresql_ready, route, timeout, interval)
+                for route in routes
+            ]
+            for future in futures:
+                future.result()
+
     @staticmethod
     def indexes_for_table(
-        sql_connect, table_name: str, table_schema: Optional[str] = None
+        sql_connect,
+        table_name: str,
+        table_schema: Optional[str] = None,
+        *,
+        use_cache: bool = False,
     ) -> List[DatabaseIndex]:
-        with sql_connect.transaction():
+        """
+        Returns the indexes of the given table. See `indexes_for_tables`.
+
+        Arguments:
+            sql_connect -- `SQLConnect` object connected to the database.
+            table_name -- Name of the table.
+            table_schema -- (optional) Schema of the table (default: the route's database).
+            use_cache -- (optional) Whether to return the indexes found by an earlier call with
+                `use_cache=True` for the same database and table, if any, instead of querying
+                the catalog, and to cache the indexes found now (default: False). Cached indexes
+                go stale when indexes are created or dropped; see `invalidate_index_cache`.
+        """
+        return Util.indexes_for_tables(
+            sql_connect, [table_name], table_schema, use_cache=use_cache
+        )[table_name]
+
+    @staticmethod
+    def indexes_for_tables(
+        sql_connect,
+        table_names: Sequence[str],
+        table_schema: Optional[str] = None,
+        *,
+        use_cache: bool = False,
+    ) -> Dict[str, List[DatabaseIndex]]:
+        """
+        Returns the indexes of the given tables, looking up all tables not cached yet in a
+        single catalog query.
+
+        Arguments:
+            sql_connect -- `SQLConnect` object connected to the database.
+            table_names -- Names of the tables.
+            table_schema -- (optional) Schema of the tables (default: the route's database).
+            use_cache -- (optional) Whether to return the indexes found by an earlier call with
+                `use_cache=True` for the same database and table, if any, instead of querying
+                the catalog, and to cache the indexes found now (default: False). Cached indexes
+                go stale when indexes are created or dropped; see `invalidate_index_cache`.
+
+        Returns:
+            Dictionary of indexes by table name, with an empty list for tables without indexes.
+        """
+        route = sql_connect.route
+        if not table_schema:
+            table_schema = route.database
+        database_key = (route.host, route.port, route.database, table_schema)
+
+        indexes_by_table: Dict[str, List[DatabaseIndex]] = {}
+        missing_table_names = []
+        for table_name in table_names:
+            cache_key = (*database_key, table_name)
+            if use_cache and cache_key in _index_cache:
+                indexes_by_table[table_name] = list(_index_cache[cache_key])
+            else:
+                indexes_by_table[table_name] = []
+                missing_table_names.append(table_name)
+        if not missing_table_names:
+            return indexes_by_table
+
+        # In autocommit mode, the query runs in a transaction of its own anyway, and an explicit
+        # one would only add BEGIN and COMMIT round-trips. Otherwise, end the transaction the
+        # query begins, so that the connection is not left idle in a transaction.
+        with nullcontext() if sql_connect.adapter.autocommit else sql_connect.transaction():
             validate_results_parity = {}
-            if not table_schema:
-                table_schema = sql_connect.route.database
             raw_indexes = sql_connect.select(
-                query_string="""
-                        SELECT
-                            tc.relname AS table_name,
-                            ic.relname AS index_name,
-                            i.indisunique AS unique,
-                            array_agg(a.attname ORDER BY a.attname) AS column_names
-                        FROM
-                            pg_class AS tc
-                            INNER JOIN pg_index AS i
-                                ON tc.oid = i.indrelid
-                            INNER JOIN pg_class AS ic
-                                ON i.indexrelid = ic.oid
-                            INNER JOIN pg_attribute AS a
-                                ON (
-                                    tc.oid = a.attrelid and
-                                    a.attnum = ANY(i.indkey)
-                                )
-                        WHERE
-                            tc.relname = %(table_name)s
-                        GROUP BY 1, 2, 3
-                        ORDER BY 1, 2, 3
-                    """,
-                query_params={"table_schema": table_schema, "table_name": table_name},
-                cursor_class=DictCursor,
+                query_string=_PG_INDEXES_QUERY,
+                query_params={"table_schema": table_schema, "table_names": missing_table_names},
+                cursor_class=TupleCursor,
                 **validate_results_parity,
             )
 
-        indexes = [
-            DatabaseIndex(
-                name=raw_index["index_name"],
-                table_schema=table_schema,
-                table_name=raw_index["table_name"],
-                unique=raw_index["unique"],
-                column_names=raw_index["column_names"],
+        # Unpack tuple rows positionally, in the order of the selected columns:
+        for table_name, index_name, unique, column_names in raw_indexes:
+            indexes_by_table[table_name].append(
+                DatabaseIndex(
+                    name=index_name,
+                    table_schema=table_schema,
+                    table_name=table_name,
+                    unique=unique,
+                    column_names=column_names,
+                )
             )
-            for raw_index in raw_indexes
-        ]
-        return indexes
+        if use_cache:
+            for table_name in missing_table_names:
+                _index_cache[(*database_key, table_name)] = list(indexes_by_table[table_name])
+        return indexes_by_table
+
+    @staticmethod
+    def invalidate_index_cache(sql_connect=None) -> None:
+        """
+        Forgets the indexes cached by `indexes_for_table`, e.g. after creating or dropping
+        indexes.
+
+        Arguments:
+            sql_connect -- (optional) Only forget the indexes of the database this `SQLConnect`
+                object is connected to (default: forget all).
+        """
+        if sql_connect is None:
+            _index_cache.clear()
+            return
+        route = sql_connect.route
+        database_key = (route.host, route.port, route.database)
+        for cache_key in [key for key in _index_cache if key[:3] == database_key]:
+            del _index_cache[cache_key]
 
     @staticmethod
     def unique_index_for_table(
-        sql_connect, table_name: str, table_schema: Optional[str] = None
+        sql_connect,
+        table_name: str,
+        table_schema: Optional[str] = None,
+        *,
+        use_cache: bool = False,
     ) -> Optional[DatabaseIndex]:
+        """
+        Returns the unique index of the given table, other than its primary key, or `None` if
+        there is none. See `indexes_for_table` for the arguments.
+
+        Raises:
+            `ValueError` if the table has more than one such unique index.
+        """
         unique_indexes = [
             index
-            for index in Util.indexes_for_table(sql_connect, table_name, table_schema)
-            if index.unique
-            and not (
-                index.name == "PRIMARY"  # MySQL
-                or index.name.endswith("_pkey")  # PostgreSQL
-                or index.name.endswith("_oid_index")  # PostgreSQL
+            for index in Util.indexes_for_table(
+                sql_connect, table_name, table_schema, use_cache=use_cache
             )
+            if index.unique
+            and index.name != "PRIMARY"  # MySQL
+            and not index.name.endswith(_SYSTEM_INDEX_SUFFIXES)
         ]
         if len(unique_indexes) > 1:
             raise ValueError(f'"{table_name}" has more than one unique index')
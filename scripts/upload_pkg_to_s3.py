@@ -1,23 +1,49 @@
 #!/usr/bin/env python
 
+import functools
 import sys
 import boto3
+from boto3.s3.transfer import TransferConfig
+
+MB = 1024 * 1024
+
+# Upload packages in 8 MB parts over up to 16 parallel connections:
+TRANSFER_CONFIG = TransferConfig(
+    multipart_threshold=8 * MB,
+    multipart_chunksize=8 * MB,
+    max_concurrency=16,
+    use_threads=True,
+)
+
+
+@functools.cache
+def _s3_client():
+    # Creating a client loads the service model and resolves credentials, so do it only once.
+    return boto3.client("s3")
 
 
 def deploy(env: str, version: str) -> None:
     bucket = f"amir-personal-deployment"
-    s3_client = boto3.client("s3")
+    s3_client = _s3_client()
     pkg_name = "pytools"
 
-    s3_keys = [f"{pkg_name}.zip", f"{pkg_name}-{version}.zip"]
+    version_key = f"{pkg_name}/{pkg_name}-{version}.zip"
+    latest_key = f"{pkg_name}/{pkg_name}.zip"
 
-    for key in s3_keys:
-        print(f"Copying latest {pkg_name} package to s3://{bucket}/{pkg_name}/{key}")
-        s3_client.upload_file(
-            Bucket=bucket,
-            Key=f"{pkg_name}/{key}",
-            Filename=f"{pkg_name}-{version}.zip",
-        )
+    print(f"Copying {pkg_name} package to s3://{bucket}/{version_key}")
+    s3_client.upload_file(
+        Bucket=bucket,
+        Key=version_key,
+        Filename=f"{pkg_name}-{version}.zip",
+        Config=TRANSFER_CONFIG,
+    )
+    # Copy the uploaded package within S3 rather than uploading it again.
+    print(f"Copying latest {pkg_name} package to s3://{bucket}/{latest_key}")
+    s3_client.copy_object(
+        Bucket=bucket,
+        Key=latest_key,
+        CopySource={"Bucket": bucket, "Key": version_key},
+    )
 
 
 if __name__ == "__main__":
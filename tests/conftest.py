@@ -50,11 +50,10 @@ def assert_dict_contains(d: dict, expected: Optional[dict] = None) -> None:
     if not isinstance(expected, dict):
         pytest.fail(f"Not a dict: {d}")
     diff = {}
-    for key in expected.keys():
-        if not key in d:
-            diff[key] = (missing, expected[key])
-        elif d[key] != expected[key]:
-            diff[key] = (d[key], expected[key])
+    for key, expected_value in expected.items():
+        value = d.get(key, missing)
+        if value is missing or value != expected_value:
+            diff[key] = (value, expected_value)
     if diff:
         key_length = max(len(key) for key in diff.keys())
         lines = ["dict keys mismatch:", "{"]
@@ -165,13 +164,16 @@ def mock_boto3_session():
 
 
 class MockParamStore(ParamStore):
-    def get_param(self, param_name, encrypted):
-        if param_name.endswith("/db_master_pass"):
-            return "master_password"
-
-        if param_name.endswith("/rds_cert"):
-            return "rds_cert"
+    # Values of parameters by name suffix; any other parameter is `True`:
+    _VALUES_BY_SUFFIX = (
+        ("/db_master_pass", "master_password"),
+        ("/rds_cert", "rds_cert"),
+    )
 
+    def get_param(self, param_name, encrypted):
+        for suffix, value in self._VALUES_BY_SUFFIX:
+            if param_name.endswith(suffix):
+                return value
         return True
 
 
@@ -0,0 +1,94 @@
+import asyncio
+from typing import Any, List
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+pytest.importorskip("psycopg")
+
+from pytools.sql.adapters.postgresql import PostgreSQLAdapter  # noqa: E402
+from pytools.sql.adapters.postgresql_v3 import PostgreSQLAdapterV3  # noqa: E402
+from pytools.sql.async_sql_connect import AsyncSQLConnect  # noqa: E402
+
+
+class FakeAsyncCursor:
+    def __init__(self, rows: List[Any]) -> None:
+        self.rows = rows
+        self.fetch_sizes: List[int] = []
+
+    async def __aenter__(self) -> "FakeAsyncCursor":
+        return self
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        pass
+
+    async def execute(self, query_string: str, query_params: Any) -> None:
+        pass
+
+    async def fetchmany(self, size: int) -> List[Any]:
+        self.fetch_sizes.append(size)
+        rows, self.rows = self.rows[:size], self.rows[size:]
+        return rows
+
+
+class TestAsyncAdapter:
+    @staticmethod
+    def collect(adapter: PostgreSQLAdapterV3, **kwargs: Any) -> List[Any]:
+        async def collect() -> List[Any]:
+            return [row async for row in adapter.aselect_iter("SELECT ...", **kwargs)]
+
+        return asyncio.run(collect())
+
+    @staticmethod
+    def adapter(cursor: FakeAsyncCursor) -> PostgreSQLAdapterV3:
+        adapter = PostgreSQLAdapterV3(MagicMock())
+        adapter._async_connection = MagicMock()
+        adapter._async_connection.cursor.return_value = cursor
+        return adapter
+
+    def test_aselect_iter_rows(self) -> None:
+        cursor = FakeAsyncCursor([(1,), (2,), (3,)])
+        assert self.collect(self.adapter(cursor), fetch_batch_size=2) == [(1,), (2,), (3,)]
+        # A short batch is the last one:
+        assert cursor.fetch_sizes == [2, 2]
+
+    def test_aselect_iter_batches(self) -> None:
+        cursor = FakeAsyncCursor([(1,), (2,), (3,), (4,), (5,)])
+        assert self.collect(self.adapter(cursor), batch_size=2, fetch_batch_size=3) == [
+            [(1,), (2,)],
+            [(3,), (4,)],
+            [(5,)],
+        ]
+
+
+class TestAsyncSQLConnect:
+    @staticmethod
+    def sql_connect() -> AsyncSQLConnect:
+        sql_connect = AsyncSQLConnect.__new__(AsyncSQLConnect)
+        sql_connect.adapter = MagicMock()
+        sql_connect._logger = MagicMock()
+        return sql_connect
+
+    def test_requires_asyncio_adapter(self) -> None:
+        with pytest.raises(TypeError):
+            AsyncSQLConnect(MagicMock(), adapter_class=PostgreSQLAdapter)
+
+    @pytest.mark.parametrize("row, value", [((42, "a"), 42), (None, None)])
+    def test_aselect_value(self, row, value) -> None:
+        sql_connect = self.sql_connect()
+        sql_connect.adapter.aselect_row = AsyncMock(return_value=row)
+        assert asyncio.run(sql_connect.aselect_value("SELECT ...")) == value
+
+    @pytest.mark.parametrize("close", [True, False])
+    def test_aopen(self, close) -> None:
+        sql_connect = self.sql_connect()
+        sql_connect.adapter.aconnect = AsyncMock()
+        sql_connect.adapter.aclose = AsyncMock()
+
+        async def use() -> None:
+            async with sql_connect.aopen(close=close) as opened:
+                assert opened is sql_connect
+                sql_connect.adapter.aconnect.assert_awaited_once_with()
+
+        asyncio.run(use())
+        assert sql_connect.adapter.aclose.await_count == int(close)
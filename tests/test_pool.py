@@ -0,0 +1,132 @@
+from unittest.mock import MagicMock
+
+import psycopg2
+import pytest
+
+from pytools.sql.adapters import pool as pool_module
+from pytools.sql.adapters.pool import ConnectionPool
+from pytools.sql.adapters.postgresql import PostgreSQLAdapter
+
+
+class FakeConnection:
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self.closed = False
+
+    def close(self) -> None:
+        self.closed = True
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def monotonic(self) -> float:
+        return self.now
+
+
+class TestConnectionPool:
+    @pytest.fixture
+    def clock(self, monkeypatch) -> FakeClock:
+        clock = FakeClock()
+        monkeypatch.setattr(pool_module, "time", clock)
+        return clock
+
+    def test_checkout_is_lifo(self, clock) -> None:
+        pool = ConnectionPool()
+        first, second = FakeConnection("first"), FakeConnection("second")
+        pool.checkin("key", first)
+        clock.now += 1
+        pool.checkin("key", second)
+        assert pool.checkout("key") is second
+        assert pool.checkout("key") is first
+        assert pool.checkout("key") is None
+
+    def test_checkout_by_key(self, clock) -> None:
+        pool = ConnectionPool()
+        connection = FakeConnection("connection")
+        pool.checkin("key", connection)
+        assert pool.checkout("other key") is None
+        assert pool.checkout("key") is connection
+
+    def test_expired_connections_are_closed(self, clock) -> None:
+        pool = ConnectionPool(idle_ttl=60)
+        expired, fresh = FakeConnection("expired"), FakeConnection("fresh")
+        pool.checkin("key", expired)
+        clock.now += 50
+        pool.checkin("key", fresh)
+        clock.now += 20
+        assert pool.checkout("key") is fresh
+        assert expired.closed
+        assert pool.checkout("key") is None
+
+    def test_max_idle(self, clock) -> None:
+        pool = ConnectionPool(max_idle=1)
+        kept, surplus = FakeConnection("kept"), FakeConnection("surplus")
+        pool.checkin("key", kept)
+        pool.checkin("key", surplus)
+        assert surplus.closed
+        assert pool.checkout("key") is kept
+
+    def test_unusable_connections_are_discarded(self, clock) -> None:
+        pool = ConnectionPool()
+        usable, unusable = FakeConnection("usable"), FakeConnection("unusable")
+        pool.checkin("key", usable)
+        pool.checkin("key", unusable)
+        assert pool.checkout("key", lambda c: c is usable) is usable
+        assert unusable.closed
+
+    def test_ping_only_after_idle(self, clock) -> None:
+        pool = ConnectionPool(ping_after=30)
+        connection = FakeConnection("connection")
+        ping = MagicMock(return_value=False)
+        pool.checkin("key", connection)
+        clock.now += 10
+        assert pool.checkout("key", ping=ping) is connection
+        ping.assert_not_called()
+
+    def test_failed_ping_discards_connection(self, clock) -> None:
+        pool = ConnectionPool(ping_after=30)
+        alive, dead = FakeConnection("alive"), FakeConnection("dead")
+        pool.checkin("key", alive)
+        pool.checkin("key", dead)
+        clock.now += 40
+        assert pool.checkout("key", ping=lambda c: c is alive) is alive
+        assert dead.closed
+        assert not alive.closed
+
+    def test_clear(self, clock) -> None:
+        pool = ConnectionPool()
+        connection = FakeConnection("connection")
+        pool.checkin("key", connection)
+        pool.clear()
+        assert connection.closed
+        assert pool.checkout("key") is None
+
+
+class TestPooledAdapterClose:
+    def adapter(self, connection) -> PostgreSQLAdapter:
+        adapter = PostgreSQLAdapter(MagicMock(), pooled=True)
+        adapter.connection_pool = ConnectionPool()
+        adapter._connection = connection
+        return adapter
+
+    def test_close_resets_session(self) -> None:
+        connection = MagicMock(closed=0)
+        cursor = connection.cursor.return_value.__enter__.return_value
+        adapter = self.adapter(connection)
+        adapter.close()
+        connection.rollback.assert_called_once_with()
+        assert connection.autocommit is True
+        cursor.execute.assert_called_once_with("DISCARD ALL")
+        connection.close.assert_not_called()
+        assert adapter.connection_pool.checkout(adapter._pool_key) is connection
+
+    def test_failed_reset_discards_connection(self) -> None:
+        connection = MagicMock(closed=0)
+        connection.rollback.side_effect = psycopg2.OperationalError("server closed the connection")
+        adapter = self.adapter(connection)
+        adapter.close()
+        connection.close.assert_called_once_with()
+        assert adapter._connection is None
+        assert not adapter.connection_pool._idle
@@ -0,0 +1,54 @@
+from unittest.mock import MagicMock
+
+import pytest
+
+pytest.importorskip("psycopg")
+
+from pytools.sql.adapters.postgresql_v3 import PostgreSQLAdapterV3  # noqa: E402
+
+
+class TestPostgreSQLAdapterV3:
+    @staticmethod
+    def adapter() -> PostgreSQLAdapterV3:
+        adapter = PostgreSQLAdapterV3(MagicMock())
+        adapter._connection = MagicMock(closed=False)
+        return adapter
+
+    @pytest.mark.parametrize("kwargs", [{"pooled": True}, {"prepare_statements": True}])
+    def test_unsupported_options(self, kwargs) -> None:
+        with pytest.raises(ValueError):
+            PostgreSQLAdapterV3(MagicMock(), **kwargs)
+
+    @pytest.mark.parametrize(
+        "server_version_num, server_version",
+        [(150004, (15, 4)), (100000, (10, 0)), (90624, (9, 6, 24))],
+    )
+    def test_server_version(self, server_version_num, server_version) -> None:
+        adapter = self.adapter()
+        adapter._connection.info.server_version = server_version_num
+        assert adapter.server_version == server_version
+
+    def test_execute_values_pages(self) -> None:
+        adapter = self.adapter()
+        cursor = MagicMock(rowcount=2)
+        affected_rows = adapter.execute_values(
+            cursor,
+            "INSERT INTO t (a, b) VALUES %s ON CONFLICT DO NOTHING",
+            [(1, "a"), (2, "b"), (3, "c")],
+            page_size=2,
+        )
+        assert [c.args for c in cursor.execute.call_args_list] == [
+            (
+                "INSERT INTO t (a, b) VALUES (%s, %s), (%s, %s) ON CONFLICT DO NOTHING",
+                [1, "a", 2, "b"],
+            ),
+            ("INSERT INTO t (a, b) VALUES (%s, %s) ON CONFLICT DO NOTHING", [3, "c"]),
+        ]
+        assert affected_rows == 4
+
+    @pytest.mark.parametrize(
+        "query_string", ["INSERT INTO t VALUES (1)", "INSERT INTO t VALUES %s RETURNING %s"]
+    )
+    def test_execute_values_needs_one_placeholder(self, query_string) -> None:
+        with pytest.raises(ValueError):
+            self.adapter().execute_values(MagicMock(), query_string, [(1,)])
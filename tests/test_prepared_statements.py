@@ -0,0 +1,109 @@
+from unittest.mock import MagicMock, call
+
+import psycopg2
+import psycopg2.errors
+import pytest
+
+from pytools.sql.adapters import postgresql
+from pytools.sql.adapters.postgresql import (
+    PostgreSQLAdapter,
+    _prepared_params,
+    _prepared_statement,
+)
+
+
+class TestPreparedStatement:
+    def test_positional_placeholders(self) -> None:
+        prepared = _prepared_statement("SELECT * FROM t WHERE a = %s AND b = %s", True)
+        assert prepared is not None
+        assert prepared.prepare_statement == (
+            f"PREPARE {prepared.name} AS SELECT * FROM t WHERE a = $1 AND b = $2"
+        )
+        assert prepared.execute_statement == f"EXECUTE {prepared.name}(%s, %s)"
+        assert prepared.param_names is None
+        assert _prepared_params(prepared, (1, 2)) == (1, 2)
+
+    def test_named_placeholders(self) -> None:
+        prepared = _prepared_statement(
+            "SELECT * FROM t WHERE a = %(a)s AND b = %(b)s OR a = %(a)s", True
+        )
+        assert prepared is not None
+        assert prepared.prepare_statement.endswith(
+            " AS SELECT * FROM t WHERE a = $1 AND b = $2 OR a = $1"
+        )
+        assert prepared.execute_statement == f"EXECUTE {prepared.name}(%s, %s)"
+        assert prepared.param_names == ("a", "b")
+        assert _prepared_params(prepared, {"b": 2, "a": 1}) == (1, 2)
+
+    def test_escaped_percent_sign(self) -> None:
+        prepared = _prepared_statement("SELECT * FROM t WHERE a LIKE '50%%' AND b = %s", True)
+        assert prepared is not None
+        assert prepared.prepare_statement.endswith(
+            " AS SELECT * FROM t WHERE a LIKE '50%' AND b = $1"
+        )
+
+    def test_without_params(self) -> None:
+        prepared = _prepared_statement("SELECT '50%'", False)
+        assert prepared is not None
+        assert prepared.prepare_statement.endswith(" AS SELECT '50%'")
+        assert prepared.execute_statement == f"EXECUTE {prepared.name}"
+
+    @pytest.mark.parametrize(
+        "query_string",
+        [
+            "CREATE TABLE t (a int)",
+            "SELECT 1; SELECT 2",
+            "SELECT $$text$$",
+            "SELECT %s, %(a)s",
+        ],
+    )
+    def test_unpreparable_statements(self, query_string) -> None:
+        assert _prepared_statement(query_string, True) is None
+
+    @pytest.mark.parametrize(
+        "query_params",
+        [{"a": 1}, (1, 2, 3), ((1, 2), 3)],
+    )
+    def test_unsuitable_params(self, query_params) -> None:
+        prepared = _prepared_statement("SELECT * FROM t WHERE a IN %s AND b = %s", True)
+        assert prepared is not None
+        assert _prepared_params(prepared, query_params) is None
+
+
+class TestPreparedExecute:
+    QUERY_STRING = "SELECT * FROM t WHERE d > NOW() - INTERVAL %s"
+
+    @pytest.fixture(autouse=True)
+    def unpreparable_statements(self, monkeypatch) -> set:
+        unpreparable_statements: set = set()
+        monkeypatch.setattr(postgresql, "_unpreparable_statements", unpreparable_statements)
+        return unpreparable_statements
+
+    @staticmethod
+    def cursor() -> MagicMock:
+        cursor = MagicMock()
+        cursor.name = None
+        cursor.connection.autocommit = True
+        return cursor
+
+    def test_executes_prepared_statement(self) -> None:
+        adapter = PostgreSQLAdapter(MagicMock(), prepare_statements=True)
+        prepared = _prepared_statement("SELECT * FROM t WHERE a = %s", True)
+        for _ in range(2):
+            cursor = self.cursor()
+            adapter._execute(cursor, "SELECT * FROM t WHERE a = %s", (1,))
+        # Prepared only once:
+        assert cursor.execute.call_args_list == [call(prepared.execute_statement, (1,))]
+
+    def test_falls_back_to_unprepared_statement(self, unpreparable_statements) -> None:
+        adapter = PostgreSQLAdapter(MagicMock(), prepare_statements=True)
+        cursor = self.cursor()
+        cursor.execute.side_effect = [psycopg2.errors.SyntaxError("syntax error"), None]
+        adapter._execute(cursor, self.QUERY_STRING, ("1 day",))
+        assert cursor.execute.call_args == call(self.QUERY_STRING, ("1 day",))
+        assert unpreparable_statements == {_prepared_statement(self.QUERY_STRING, True).name}
+
+        # Not tried again:
+        cursor = self.cursor()
+        adapter._execute(cursor, self.QUERY_STRING, ("1 day",))
+        assert cursor.execute.call_args_list == [call(self.QUERY_STRING, ("1 day",))]
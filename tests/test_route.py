@@ -0,0 +1,43 @@
+import threading
+from unittest.mock import MagicMock
+
+import pytest
+
+from pytools.sql import route as route_module
+from pytools.sql.route import Route
+
+
+class TestDefaultBoto3Session:
+    def test_one_session_per_thread(self, monkeypatch) -> None:
+        monkeypatch.setattr(route_module, "_new_default_boto3_session", object)
+        # Restored, with the sessions of this process, after the test:
+        monkeypatch.setattr(route_module, "_default_boto3_sessions", threading.local())
+        route = Route(host="localhost", port=5432, user="user")
+        session = route.boto3_session
+        assert route.boto3_session is session
+
+        other_thread_sessions = []
+        thread = threading.Thread(target=lambda: other_thread_sessions.append(route.boto3_session))
+        thread.start()
+        thread.join()
+        assert other_thread_sessions[0] is not session
+
+        route_module._reset_default_boto3_sessions()
+        assert route.boto3_session is not session
+
+
+class TestPhysicalRoute:
+    @pytest.mark.parametrize("control_persist", [None, 60])
+    def test_ssh_control_persist(self, monkeypatch, control_persist) -> None:
+        ssh_tunnel_class = MagicMock()
+        monkeypatch.setattr(Route, "ssh_tunnel_class", ssh_tunnel_class)
+        monkeypatch.setattr(Route, "ssh_control_persist", control_persist)
+        route = Route(host="db", port=5432, user="user", bastion_host="bastion")
+        with route.physical_route() as physical_route:
+            assert physical_route.host == Route.LOCAL_HOST_DEFAULT
+        kwargs = ssh_tunnel_class.call_args.kwargs
+        assert kwargs["bastion_host"] == "bastion"
+        if control_persist is None:
+            assert "control_persist" not in kwargs
+        else:
+            assert kwargs["control_persist"] == control_persist
@@ -0,0 +1,151 @@
+from unittest.mock import MagicMock
+
+import pytest
+
+from pytools.sql import SQLConnect
+from pytools.sql.sql_connect import _combine_delete_insert, _counting_insert
+
+
+class TestCombineDeleteInsert:
+    def test_combines_statements(self) -> None:
+        combined = _combine_delete_insert(
+            "t",
+            "DELETE FROM t WHERE d = %s",
+            ("old",),
+            "INSERT INTO t (d) VALUES (%s)",
+            ("new",),
+        )
+        assert combined is not None
+        query_string, query_params = combined
+        assert query_string.startswith("WITH deleted AS (")
+        assert query_params == ("old", "new")
+
+    def test_trailing_comment_does_not_swallow_clauses(self) -> None:
+        combined = _combine_delete_insert(
+            "t",
+            "DELETE FROM t WHERE d = %s -- old rows",
+            ("old",),
+            "INSERT INTO t (d) VALUES (%s) -- new rows",
+            ("new",),
+        )
+        assert combined is not None
+        query_string, _ = combined
+        for line in query_string.splitlines():
+            if "--" in line:
+                assert line.endswith(("-- old rows", "-- new rows"))
+        assert "\nRETURNING 1\n), inserted AS (" in query_string
+        assert "\nRETURNING 1\n)\nSELECT " in query_string
+
+    def test_insert_reading_target_table_is_not_combined(self) -> None:
+        assert (
+            _combine_delete_insert(
+                "public.t",
+                "DELETE FROM t WHERE d = %s",
+                ("old",),
+                "INSERT INTO t (d) SELECT d || '_copy' FROM t WHERE d = %s",
+                ("old",),
+            )
+            is None
+        )
+
+    def test_insert_reading_other_table_is_combined(self) -> None:
+        assert (
+            _combine_delete_insert(
+                "t",
+                "DELETE FROM t WHERE d = %s",
+                ("old",),
+                "INSERT INTO t (d) SELECT d FROM t_staging WHERE d = %s",
+                ("old",),
+            )
+            is not None
+        )
+
+
+class TestCountingInsert:
+    def test_wraps_insert(self) -> None:
+        query_string = _counting_insert("INSERT INTO t VALUES (1)")
+        assert query_string is not None
+        assert query_string.startswith("WITH upserted AS (")
+
+    def test_trailing_comment_does_not_swallow_clauses(self) -> None:
+        query_string = _counting_insert("INSERT INTO t VALUES (1)\n-- upsert t")
+        assert query_string is not None
+        assert "-- upsert t\nRETURNING (xmax = 0) AS inserted\n)\nSELECT " in query_string
+
+    @pytest.mark.parametrize(
+        "query_string",
+        [
+            "UPDATE t SET v = 1",
+            "INSERT INTO t VALUES (1) RETURNING k",
+            "WITH r AS (VALUES (1)) INSERT INTO t SELECT * FROM r",
+            "INSERT INTO t VALUES (1); INSERT INTO t VALUES (2)",
+        ],
+    )
+    def test_does_not_wrap_unsafe_statements(self, query_string) -> None:
+        assert _counting_insert(query_string) is None
+
+
+class TestInsertUpdateReport:
+    UPSERT = "INSERT INTO t (k, v) VALUES (1, 'a') ON CONFLICT (k) DO UPDATE SET v = EXCLUDED.v"
+
+    @staticmethod
+    def sql_connect() -> SQLConnect:
+        sql_connect = SQLConnect.__new__(SQLConnect)
+        sql_connect.adapter = MagicMock()
+        sql_connect._logger = MagicMock()
+        return sql_connect
+
+    def test_report_is_the_same_on_both_paths(self) -> None:
+        # Table with 10 rows; the statement inserts 2 rows and updates 3.
+        returning_connect = self.sql_connect()
+        returning_connect.adapter.select_row.return_value = (2, 3)
+        returning_report = returning_connect.execute_insert_update_query(
+            "t", self.UPSERT, full_stats=True
+        )
+        returning_connect.adapter.select_value.assert_not_called()
+
+        count_connect = self.sql_connect()
+        count_connect.adapter.select_value.side_effect = [10, 12]
+        count_connect.adapter.cursor.return_value.rowcount = 5
+        count_report = count_connect.execute_insert_update_query(
+            "t", f"WITH r AS (VALUES (1)) {self.UPSERT}", full_stats=True
+        )
+        count_connect.adapter.select_row.assert_not_called()
+
+        assert returning_report == count_report
+        assert returning_report["affected_rows"] == 5
+        assert returning_report["inserted_rows"] == 2
+        assert returning_report["duplicate_rows"] == 3
+
+
+class TestYieldFetchmanyQuery:
+    @staticmethod
+    def sql_connect(autocommit: bool) -> SQLConnect:
+        sql_connect = SQLConnect.__new__(SQLConnect)
+        sql_connect.adapter = MagicMock(autocommit=autocommit, transaction_level=0)
+        sql_connect.adapter.cursor.return_value.fetchmany.side_effect = [
+            [{"a": 1}, {"a": 2}],
+            [{"a": 3}],
+            [],
+        ]
+        return sql_connect
+
+    def test_early_break_does_not_roll_back(self) -> None:
+        sql_connect = self.sql_connect(autocommit=True)
+        transaction = sql_connect.adapter.transaction.return_value
+        batches = sql_connect.yield_fetchmany_query("SELECT a FROM t", size=2)
+        for batch in batches:
+            assert batch == [{"a": 1}, {"a": 2}]
+            break
+        batches.close()
+        sql_connect.adapter.cursor.return_value.close.assert_called_once_with()
+        # The transaction context was exited without an exception, i.e. committed:
+        transaction.__exit__.assert_called_once_with(None, None, None)
+
+    def test_uses_callers_transaction(self) -> None:
+        sql_connect = self.sql_connect(autocommit=False)
+        batches = list(sql_connect.yield_fetchmany_query("SELECT a FROM t", size=2))
+        assert batches == [[{"a": 1}, {"a": 2}], [{"a": 3}]]
+        sql_connect.adapter.transaction.assert_not_called()
+        sql_connect.adapter.commit.assert_not_called()
+        sql_connect.adapter.rollback.assert_not_called()
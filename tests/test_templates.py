@@ -0,0 +1,42 @@
+import jinja2
+import pytest
+
+from pytools.sql.sql_connect import _compile_template, _SimpleTemplate
+
+FRAGMENTS = {"table": "users", "column": "name", "limit": 10, "empty": None}
+
+
+class TestSimpleTemplate:
+    @pytest.mark.parametrize(
+        "template_string",
+        [
+            "SELECT {{ column }} FROM {{table}} LIMIT {{ limit }}",
+            "SELECT {{ undefined }} FROM {{ table }}",
+            "SELECT {{ empty }}",
+            "SELECT 1\r\nFROM {{ table }}\rWHERE true\r\n",
+            "SELECT 1\n\n",
+            "{{ table }}\n",
+            "SELECT '{ }', '}}', '{x}' FROM {{ table }}",
+            "SELECT {{ column }}{{ column }}",
+            "",
+        ],
+    )
+    def test_matches_jinja2(self, template_string) -> None:
+        template = _compile_template(template_string, "test.sql")
+        assert isinstance(template, _SimpleTemplate)
+        assert template.render(FRAGMENTS) == jinja2.Template(template_string).render(FRAGMENTS)
+
+    @pytest.mark.parametrize(
+        "template_string",
+        [
+            "SELECT {{ none }}, {{ True }}",
+            "SELECT {{ 1 }}",
+            "SELECT {{ range }}",
+            "SELECT {{ column | upper }}",
+            "SELECT {{- column }}",
+            "SELECT {{ column }} {% if limit %}LIMIT {{ limit }}{% endif %}",
+            "SELECT {# comment #} 1",
+        ],
+    )
+    def test_falls_back_to_jinja2(self, template_string) -> None:
+        assert not isinstance(_compile_template(template_string, "test.sql"), _SimpleTemplate)
@@ -0,0 +1,51 @@
+from unittest.mock import MagicMock
+
+import pytest
+
+from pytools.sql import util
+from pytools.sql.util import Util
+
+
+class TestIndexesForTables:
+    @pytest.fixture(autouse=True)
+    def index_cache(self, monkeypatch) -> dict:
+        index_cache: dict = {}
+        monkeypatch.setattr(util, "_index_cache", index_cache)
+        return index_cache
+
+    @staticmethod
+    def sql_connect(autocommit: bool) -> MagicMock:
+        sql_connect = MagicMock()
+        sql_connect.route.database = "db"
+        sql_connect.adapter.autocommit = autocommit
+        sql_connect.select.return_value = [("t", "t_a_idx", True, ["a"])]
+        return sql_connect
+
+    @pytest.mark.parametrize("autocommit", [True, False])
+    def test_transaction_only_without_autocommit(self, autocommit) -> None:
+        sql_connect = self.sql_connect(autocommit)
+        indexes = Util.indexes_for_tables(sql_connect, ["t", "u"])
+        assert [index.name for index in indexes["t"]] == ["t_a_idx"]
+        assert indexes["u"] == []
+        assert sql_connect.transaction.called is not autocommit
+
+    def test_no_cache_by_default(self, index_cache) -> None:
+        sql_connect = self.sql_connect(autocommit=True)
+        Util.indexes_for_tables(sql_connect, ["t"])
+        Util.indexes_for_tables(sql_connect, ["t"])
+        assert sql_connect.select.call_count == 2
+        assert not index_cache
+
+    def test_use_cache(self) -> None:
+        sql_connect = self.sql_connect(autocommit=True)
+        Util.indexes_for_tables(sql_connect, ["t"], use_cache=True)
+        indexes = Util.indexes_for_tables(sql_connect, ["t"], use_cache=True)
+        assert sql_connect.select.call_count == 1
+        assert [index.name for index in indexes["t"]] == ["t_a_idx"]
+
+    def test_unique_index_for_table_use_cache(self) -> None:
+        sql_connect = self.sql_connect(autocommit=True)
+        for _ in range(2):
+            unique_index = Util.unique_index_for_table(sql_connect, "t", use_cache=True)
+            assert unique_index is not None and unique_index.name == "t_a_idx"
+        assert sql_connect.select.call_count == 1